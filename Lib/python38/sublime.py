@@ -4,11 +4,20 @@
 # Don't evaluate type annotations at runtime
 from __future__ import annotations
 
+import array
+import bisect
 import collections
+import copy
+import fnmatch
+import heapq
 import html
 import json
 import sys
 import io
+import threading
+import time
+import traceback
+import weakref
 import enum
 from typing import Callable, Optional, Any, Iterator, Iterable, Literal, TYPE_CHECKING
 
@@ -1188,13 +1197,217 @@ def score_selector(scope_name: str, selector: str) -> int:
     return sublime_api.score_selector(scope_name, selector)
 
 
+class Selector:
+    """
+    A scope selector that remembers its score for each scope name it has been
+    matched against, so matching the same scopes repeatedly, as when scanning
+    through a buffer, only asks Sublime Text once per distinct scope name::
+
+        STRING_OR_COMMENT = sublime.Selector('string, comment')
+
+        for skip in view.match_selector_many(points, STRING_OR_COMMENT):
+            ...
+
+    A `Selector` can be used anywhere `View.match_selector_many` takes a
+    selector string.
+    """
+
+    __slots__ = ['selector', '_scores']
+
+    MAX_CACHED_SCOPES = 1024
+    """ The scores remembered before the cache is cleared. """
+
+    def __init__(self, selector: str):
+        self.selector: str = selector
+        """ The selector string. """
+        self._scores: dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return f'Selector({self.selector!r})'
+
+    def __str__(self) -> str:
+        return self.selector
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Selector):
+            return self.selector == other.selector
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.selector)
+
+    def score(self, scope_name: str) -> int:
+        """ Same as `sublime.score_selector` with this selector. """
+        scores = self._scores
+        score = scores.get(scope_name)
+        if score is None:
+            score = sublime_api.score_selector(scope_name, self.selector)
+            if len(scores) >= self.MAX_CACHED_SCOPES:
+                scores.clear()
+            scores[scope_name] = score
+        return score
+
+    def match(self, scope_name: str) -> bool:
+        """ :returns: Whether the selector matches ``scope_name``. """
+        return self.score(scope_name) > 0
+
+
+_selectors: dict[str, Selector] = {}
+_MAX_CACHED_SELECTORS = 256
+
+
+def _selector(selector: str | Selector) -> Selector:
+    """
+    :returns: A shared `Selector` for a selector string.
+
+    :meta private:
+    """
+    if isinstance(selector, Selector):
+        return selector
+
+    compiled = _selectors.get(selector)
+    if compiled is None:
+        if len(_selectors) >= _MAX_CACHED_SELECTORS:
+            _selectors.clear()
+        compiled = _selectors[selector] = Selector(selector)
+    return compiled
+
+
+SCOPE_GROUP_GAP = 4096
+"""
+The largest distance between two points for `View.scope_name_many` to read
+their scopes with the same call.
+
+:meta private:
+"""
+
+RESOURCE_CACHE_TTL = 10.0
+"""
+How long, in seconds, the resource index and loaded resources are cached
+before being read from Sublime Text again. The cache is also cleared when
+packages are added or removed, and when a file under `packages_path()` is
+saved.
+"""
+RESOURCE_CACHE_BYTES = 8 * 1024 * 1024
+""" The memory, in bytes, allowed for caching loaded resources. """
+
+
+class _ResourceCache:
+    """
+    Caches `find_resources` and `load_resource` results. Every resource path
+    is fetched once and indexed by file name, so a pattern without wildcards
+    is a dict lookup and other patterns are matched in Python, with the
+    result cached per pattern. Loaded resources are kept in an LRU bounded
+    by `RESOURCE_CACHE_BYTES`.
+    """
+
+    __slots__ = ['lock', 'built', 'paths', 'by_name', 'globs', 'data', 'data_bytes', 'hits', 'misses', 'generation']
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: collections.OrderedDict[tuple[str, bool], tuple[str | bytes, int]] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.built = None
+            self.paths: list[str] = []
+            self.by_name: dict[str, list[str]] = {}
+            self.globs: dict[str, list[str]] = {}
+            self.data.clear()
+            self.data_bytes = 0
+
+    def _check_age(self):
+        if self.built is not None and time.monotonic() - self.built > RESOURCE_CACHE_TTL:
+            self.clear()
+
+    def find(self, pattern: str) -> list[str]:
+        self._check_age()
+        with self.lock:
+            if self.built is None:
+                self.paths = sublime_api.find_resources('')
+                by_name = {}
+                for path in self.paths:
+                    by_name.setdefault(path[path.rfind('/') + 1:], []).append(path)
+                self.by_name = by_name
+                self.built = time.monotonic()
+
+            if not pattern:
+                return list(self.paths)
+            if not any(c in pattern for c in '*?['):
+                return list(self.by_name.get(pattern, ()))
+
+            result = self.globs.get(pattern)
+            if result is None:
+                names = {n for n in self.by_name if fnmatch.fnmatchcase(n, pattern)}
+                result = [p for p in self.paths if p[p.rfind('/') + 1:] in names]
+                self.globs[pattern] = result
+            return list(result)
+
+    def load(self, name: str, binary: bool, loader: Callable[[str], str | bytes | None]):
+        self._check_age()
+        key = (name, binary)
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                self.data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = loader(name)
+        if value is None:
+            return None
+
+        size = sys.getsizeof(value)
+        if size <= RESOURCE_CACHE_BYTES // 4:
+            with self.lock:
+                if self.built is None:
+                    self.built = time.monotonic()
+                old = self.data.pop(key, None)
+                if old is not None:
+                    self.data_bytes -= old[1]
+                self.data[key] = (value, size)
+                self.data_bytes += size
+                while self.data_bytes > RESOURCE_CACHE_BYTES:
+                    _, (_, evicted) = self.data.popitem(last=False)
+                    self.data_bytes -= evicted
+        return value
+
+    def stats(self) -> dict[str, int]:
+        # Expire first, so the generation moves on once the cache is stale
+        # even if nothing has looked a resource up since
+        self._check_age()
+        with self.lock:
+            return {
+                'resources': len(self.paths),
+                'patterns': len(self.globs),
+                'loaded': len(self.data),
+                'loaded_bytes': self.data_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'generation': self.generation,
+            }
+
+
+_resource_cache = _ResourceCache()
+
+
+def _invalidate_resource_cache():
+    _resource_cache.clear()
+
+
 def load_resource(name: str) -> str:
     """
     Loads the given resource. The name should be in the format "Packages/Default/Main.sublime-menu".
 
     :raises FileNotFoundError: if resource is not found
     """
-    s = sublime_api.load_resource(name)
+    s = _resource_cache.load(name, False, sublime_api.load_resource)
     if s is None:
         raise FileNotFoundError(f'resource "{name}" not found')
     return s
@@ -1206,7 +1419,7 @@ def load_binary_resource(name) -> bytes:
 
     :raises FileNotFoundError: if resource is not found
     """
-    bytes = sublime_api.load_binary_resource(name)
+    bytes = _resource_cache.load(name, True, sublime_api.load_binary_resource)
     if bytes is None:
         raise FileNotFoundError(f'resource "{name}" not found')
     return bytes
@@ -1216,7 +1429,19 @@ def find_resources(pattern: str) -> list[str]:
     """
     Finds resources whose file name matches the given glob pattern.
     """
-    return sublime_api.find_resources(pattern)
+    return _resource_cache.find(pattern)
+
+
+def resource_cache_stats() -> dict[str, int]:
+    """
+    :returns: For diagnostics, the number of indexed resources, cached
+              patterns and loaded resources, the bytes used by loaded
+              resources, and the load hit and miss counts. ``generation``
+              changes each time the cache is discarded or expires, so it
+              can be used to tell when results derived from
+              `find_resources` may be stale.
+    """
+    return _resource_cache.stats()
 
 
 def encode_value(value: Value, pretty=False, update_text: str = None) -> str:
@@ -1280,21 +1505,152 @@ def save_settings(base_name: str):
     sublime_api.save_settings(base_name)
 
 
-def set_timeout(callback: Callable, delay: int = 0):
+TIMER_RESOLUTION = 5
+"""
+The granularity, in milliseconds, of `set_timeout` and `set_timeout_async`.
+Callbacks due within the same tick share a single timeout in Sublime Text, and
+callbacks with a delay are run up to this much later than requested.
+"""
+
+
+class TimerHandle:
+    """
+    A callback scheduled by `set_timeout` or `set_timeout_async`, which may
+    be cancelled until it runs.
+    """
+
+    __slots__ = ['callback', 'due', '_wheel', '_state']
+
+    _PENDING = 0
+    _RAN = 1
+    _CANCELLED = 2
+
+    def __init__(self, wheel: _TimerWheel, callback: Callable, due: float):
+        self._wheel = wheel
+        self.callback: Callable = callback
+        """ The callback to run. """
+        self.due: float = due
+        """ When the callback is due, in milliseconds of ``time.monotonic()``. """
+        self._state = TimerHandle._PENDING
+
+    def __repr__(self) -> str:
+        state = ('pending', 'ran', 'cancelled')[self._state]
+        return f'TimerHandle({self.callback!r}, {state})'
+
+    def cancel(self) -> bool:
+        """
+        Stop the callback from running.
+
+        :returns: Whether the callback was pending, and so was cancelled.
+        """
+        with self._wheel.lock:
+            if self._state != TimerHandle._PENDING:
+                return False
+            self._state = TimerHandle._CANCELLED
+            self._wheel.pending -= 1
+            self.callback = None
+            return True
+
+    def is_pending(self) -> bool:
+        """ :returns: Whether the callback has neither run nor been cancelled. """
+        return self._state == TimerHandle._PENDING
+
+
+class _TimerWheel:
+    """
+    Groups timeouts into ticks of `TIMER_RESOLUTION` milliseconds, with one
+    timeout in Sublime Text per tick that has callbacks, which then runs
+    them in the order they were added. Callbacks without a delay share tick
+    ``0``, which runs as soon as possible.
+    """
+
+    __slots__ = ['native', 'lock', 'slots', 'pending']
+
+    def __init__(self, native: Callable[[Callable, int], None]):
+        self.native = native
+        self.lock = threading.Lock()
+        self.slots: dict[int, list[TimerHandle]] = {}
+        self.pending = 0
+
+    def add(self, callback: Callable, delay: int) -> TimerHandle:
+        now = time.monotonic() * 1000
+        if delay > 0:
+            due = now + delay
+            tick = -int(-due // TIMER_RESOLUTION)
+        else:
+            due = now
+            tick = 0
+        handle = TimerHandle(self, callback, due)
+
+        with self.lock:
+            slot = self.slots.get(tick)
+            schedule = slot is None
+            if schedule:
+                slot = self.slots[tick] = []
+            slot.append(handle)
+            self.pending += 1
+
+        if schedule:
+            self.native(lambda: self.run(tick), max(0, int(tick * TIMER_RESOLUTION - now)) if tick else 0)
+        return handle
+
+    def run(self, tick: int):
+        with self.lock:
+            slot = self.slots.pop(tick, ())
+
+        for handle in slot:
+            with self.lock:
+                if handle._state != TimerHandle._PENDING:
+                    continue
+                handle._state = TimerHandle._RAN
+                self.pending -= 1
+                callback = handle.callback
+                handle.callback = None
+
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+
+
+_main_timers = _TimerWheel(lambda callback, delay: sublime_api.set_timeout(callback, delay))
+_async_timers = _TimerWheel(lambda callback, delay: sublime_api.set_timeout_async(callback, delay))
+
+
+def set_timeout(callback: Callable, delay: int = 0) -> TimerHandle:
     """
     Run the ``callback`` in the main thread after the given ``delay``
     (in milliseconds). Callbacks with an equal delay will be run in the order
     they were added.
+
+    :returns: A `TimerHandle` which can be used to cancel the callback.
     """
-    sublime_api.set_timeout(callback, delay)
+    return _main_timers.add(callback, delay)
 
 
-def set_timeout_async(callback: Callable, delay: int = 0):
+def set_timeout_async(callback: Callable, delay: int = 0) -> TimerHandle:
     """
     Runs the callback on an alternate thread after the given delay
     (in milliseconds).
+
+    :returns: A `TimerHandle` which can be used to cancel the callback.
+    """
+    return _async_timers.add(callback, delay)
+
+
+def pending_timeouts() -> dict[str, int]:
+    """
+    :returns: For diagnostics, the number of callbacks waiting to run, and
+              the number of timeouts scheduled in Sublime Text for them, on
+              the main and async threads.
     """
-    sublime_api.set_timeout_async(callback, delay)
+    with _main_timers.lock, _async_timers.lock:
+        return {
+            'main': _main_timers.pending,
+            'main_ticks': len(_main_timers.slots),
+            'async': _async_timers.pending,
+            'async_ticks': len(_async_timers.slots),
+        }
 
 
 def active_window() -> Window:
@@ -1340,20 +1696,40 @@ def folder_history() -> list[str]:
     return sublime_api.folder_history()
 
 
+_window_wrappers: weakref.WeakValueDictionary[int, Window] = weakref.WeakValueDictionary()
+_view_wrappers: weakref.WeakValueDictionary[int, View] = weakref.WeakValueDictionary()
+_buffer_wrappers: weakref.WeakValueDictionary[int, Buffer] = weakref.WeakValueDictionary()
+
+
 class Window:
     """
     """
 
+    def __new__(cls, *args, **kwargs):
+        # While a Window object for an id is alive, constructing another
+        # returns the same object. Subclasses may take other arguments, and
+        # are never shared
+        if cls is Window:
+            id = args[0] if args else kwargs.get('id')
+            window = _window_wrappers.get(id)
+            if window is not None:
+                return window
+        return super().__new__(cls)
+
     def __init__(self, id: int):
+        if 'window_id' in self.__dict__:
+            return
         self.window_id = id
         self.settings_object: Optional[Settings] = None
         self.template_settings_object: Optional[Settings] = None
+        if type(self) is Window:
+            _window_wrappers[id] = self
 
     def __hash__(self) -> int:
         return self.window_id
 
     def __eq__(self, other):
-        return isinstance(other, Window) and other.window_id == self.window_id
+        return self is other or (isinstance(other, Window) and other.window_id == self.window_id)
 
     def __bool__(self) -> bool:
         return self.window_id != 0
@@ -2257,6 +2633,291 @@ class TextChange:
                 f'str={self.str!r})')
 
 
+class TextChangeBatch:
+    """
+    A compact, read-only sequence of `TextChange` objects. The positions and
+    lengths are stored as parallel ``array('q')`` columns, and the new
+    contents of every change are joined into a single string with an
+    ``offsets`` column marking where each change's text starts.
+
+    `TextChangeListener` subclasses receive one of these instead of a
+    ``list`` when they set ``compact_changes = True``. Indexing or iterating
+    the batch creates `TextChange` objects on demand; the column attributes
+    and `replacements` can be used to avoid that.
+    """
+
+    __slots__ = [
+        'a_pt', 'a_row', 'a_col', 'a_col_utf16', 'a_col_utf8',
+        'b_pt', 'b_row', 'b_col', 'b_col_utf16', 'b_col_utf8',
+        'len_utf16', 'len_utf8', 'text', 'offsets',
+    ]
+
+    def __init__(self, changes: Iterable[TextChange] = ()):
+        """
+        :param changes: The `TextChange` objects to store, in order.
+        """
+        for name in self.__slots__:
+            if name != 'text':
+                setattr(self, name, array.array('q'))
+
+        a_pt, a_row, a_col = self.a_pt.append, self.a_row.append, self.a_col.append
+        a_col_utf16, a_col_utf8 = self.a_col_utf16.append, self.a_col_utf8.append
+        b_pt, b_row, b_col = self.b_pt.append, self.b_row.append, self.b_col.append
+        b_col_utf16, b_col_utf8 = self.b_col_utf16.append, self.b_col_utf8.append
+        len_utf16, len_utf8 = self.len_utf16.append, self.len_utf8.append
+        offset = self.offsets.append
+
+        strings = []
+        total = 0
+        for change in changes:
+            a, b = change.a, change.b
+            a_pt(a.pt)
+            a_row(a.row)
+            a_col(a.col)
+            a_col_utf16(a.col_utf16)
+            a_col_utf8(a.col_utf8)
+            b_pt(b.pt)
+            b_row(b.row)
+            b_col(b.col)
+            b_col_utf16(b.col_utf16)
+            b_col_utf8(b.col_utf8)
+            len_utf16(change.len_utf16)
+            len_utf8(change.len_utf8)
+            offset(total)
+            strings.append(change.str)
+            total += len(change.str)
+        offset(total)
+
+        self.text: str = ''.join(strings)
+        """ The new contents of all the changes, concatenated. """
+
+    def __len__(self) -> int:
+        return len(self.a_pt)
+
+    def __repr__(self) -> str:
+        return f'TextChangeBatch(<{len(self)} changes>)'
+
+    def __getitem__(self, index: int) -> TextChange:
+        """ :returns: The change at ``index`` as a new `TextChange`. """
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('TextChangeBatch index out of range')
+
+        return TextChange(
+            HistoricPosition(self.a_pt[index], self.a_row[index], self.a_col[index],
+                             self.a_col_utf16[index], self.a_col_utf8[index]),
+            HistoricPosition(self.b_pt[index], self.b_row[index], self.b_col[index],
+                             self.b_col_utf16[index], self.b_col_utf8[index]),
+            self.len_utf16[index],
+            self.len_utf8[index],
+            self.str(index))
+
+    def __iter__(self) -> Iterator[TextChange]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def str(self, index: int) -> str:
+        """ :returns: The new contents of the change at ``index``. """
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+    def replacements(self) -> Iterator[tuple[Point, Point, str]]:
+        """
+        :returns: An iterator of ``(a.pt, b.pt, str)`` for each change, in
+                  order, which is all that's needed to replay the changes.
+        """
+        text, offsets = self.text, self.offsets
+        for i, (a, b) in enumerate(zip(self.a_pt, self.b_pt)):
+            yield (a, b, text[offsets[i]:offsets[i + 1]])
+
+    def to_list(self) -> list[TextChange]:
+        """ :returns: The changes as a ``list`` of `TextChange` objects. """
+        return list(self)
+
+
+class RegionSet:
+    """
+    A sorted set of non-overlapping regions stored as two ``array('q')``
+    columns of begin and end points. Used for region algebra over large
+    numbers of regions without creating a `Region` object per entry.
+
+    Regions are normalized: ordering of ``a`` and ``b`` is dropped and
+    overlapping regions are merged. Touching regions, and empty regions that
+    only touch another region, are kept separate.
+    """
+
+    __slots__ = ['begins', 'ends']
+
+    def __init__(self, regions: Iterable[Region | tuple[Point, Point]] = ()):
+        """
+        :param regions: `Region` objects or ``(a, b)`` tuples, in any order.
+        """
+        if isinstance(regions, RegionSet):
+            self.begins = array.array('q', regions.begins)
+            self.ends = array.array('q', regions.ends)
+            return
+
+        pairs = []
+        for r in regions:
+            a, b = (r.a, r.b) if isinstance(r, Region) else r
+            pairs.append((a, b) if a <= b else (b, a))
+        pairs.sort()
+        self.begins, self.ends = _merge_sorted_pairs(pairs)
+
+    @classmethod
+    def _from_arrays(cls, begins: array.array, ends: array.array) -> RegionSet:
+        rs = cls.__new__(cls)
+        rs.begins = begins
+        rs.ends = ends
+        return rs
+
+    def __len__(self) -> int:
+        """ :returns: The number of regions in the set. """
+        return len(self.begins)
+
+    def __bool__(self) -> bool:
+        return len(self.begins) > 0
+
+    def __iter__(self) -> Iterator[Region]:
+        """ Iterate through the regions, creating a `Region` for each. """
+        for a, b in zip(self.begins, self.ends):
+            yield Region(a, b)
+
+    def __getitem__(self, index: int) -> Region:
+        return Region(self.begins[index], self.ends[index])
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, RegionSet) and self.begins == rhs.begins and self.ends == rhs.ends
+
+    def __repr__(self) -> str:
+        return f'RegionSet({list(zip(self.begins, self.ends))!r})'
+
+    def __contains__(self, x: Region | Point) -> bool:
+        """
+        :returns: Whether the `Point` or `Region` is entirely contained within
+                  one of the regions of the set.
+        """
+        if isinstance(x, Region):
+            i = self.find(x.begin())
+            return i != -1 and x.end() <= self.ends[i]
+        return self.find(x) != -1
+
+    def find(self, pt: Point) -> int:
+        """
+        :returns: The index of the region containing ``pt``, or ``-1``.
+        """
+        i = bisect.bisect_right(self.begins, pt) - 1
+        if i >= 0 and pt <= self.ends[i]:
+            return i
+        return -1
+
+    def to_list(self) -> list[Region]:
+        """ :returns: The regions as a list of `Region` objects. """
+        return list(self)
+
+    def size(self) -> int:
+        """ :returns: The total number of characters covered by the set. """
+        return sum(self.ends) - sum(self.begins)
+
+    def union(self, other: RegionSet) -> RegionSet:
+        """ :returns: A set covering the regions of both sets. """
+        pairs = list(heapq.merge(
+            zip(self.begins, self.ends), zip(other.begins, other.ends)))
+        return RegionSet._from_arrays(*_merge_sorted_pairs(pairs))
+
+    def intersection(self, other: RegionSet) -> RegionSet:
+        """ :returns: A set covering only text covered by both sets. """
+        begins = array.array('q')
+        ends = array.array('q')
+        ab, ae, bb, be = self.begins, self.ends, other.begins, other.ends
+        i = j = 0
+        while i < len(ab) and j < len(bb):
+            lo = max(ab[i], bb[j])
+            hi = min(ae[i], be[j])
+            if lo < hi or (lo == hi and (ab[i] == ae[i] or bb[j] == be[j])):
+                begins.append(lo)
+                ends.append(hi)
+            if ae[i] < be[j] or (ae[i] == be[j] and ab[i] <= bb[j]):
+                i += 1
+            else:
+                j += 1
+        return RegionSet._from_arrays(begins, ends)
+
+    def difference(self, other: RegionSet) -> RegionSet:
+        """ :returns: A set covering text in this set but not in ``other``. """
+        begins = array.array('q')
+        ends = array.array('q')
+        bb, be = other.begins, other.ends
+        j = 0
+        for a, b in zip(self.begins, self.ends):
+            while j < len(bb) and be[j] < a:
+                j += 1
+            if a == b:
+                if j == len(bb) or bb[j] > a:
+                    begins.append(a)
+                    ends.append(b)
+                continue
+            k = j
+            while k < len(bb) and bb[k] < b:
+                if bb[k] > a:
+                    begins.append(a)
+                    ends.append(bb[k])
+                a = max(a, be[k])
+                k += 1
+            if a < b:
+                begins.append(a)
+                ends.append(b)
+        return RegionSet._from_arrays(begins, ends)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def shift(self, change: TextChange) -> RegionSet:
+        """
+        :returns: The set transformed to account for ``change``. Text after
+                  the change is moved by its length difference, and regions
+                  overlapping the replaced text are clamped to it.
+        """
+        start = change.a.pt
+        stop = change.b.pt
+        new_stop = start + len(change.str)
+        delta = new_stop - stop
+
+        begins = array.array('q', self.begins)
+        ends = array.array('q', self.ends)
+        first = bisect.bisect_left(ends, start)
+        for i in range(first, len(begins)):
+            b = begins[i]
+            if b >= stop and b > start:
+                begins[i] = b + delta
+            elif b > start:
+                begins[i] = start
+            e = ends[i]
+            if e >= stop and e > start:
+                ends[i] = e + delta
+            elif e > start:
+                ends[i] = new_stop
+
+        # Regions clamped to the replaced text may now overlap
+        return RegionSet._from_arrays(*_merge_sorted_pairs(zip(begins, ends)))
+
+
+def _merge_sorted_pairs(pairs: Iterable[tuple[Point, Point]]) -> tuple[array.array, array.array]:
+    begins = array.array('q')
+    ends = array.array('q')
+    for a, b in pairs:
+        if ends and a < ends[-1]:
+            if b > ends[-1]:
+                ends[-1] = b
+        elif ends and a == begins[-1] and b == ends[-1]:
+            continue
+        else:
+            begins.append(a)
+            ends.append(b)
+    return begins, ends
+
+
 class Selection:
     """
     Maintains a set of sorted non-overlapping Regions. A selection may be
@@ -2297,11 +2958,11 @@ class Selection:
 
     def __eq__(self, rhs: object) -> bool:
         """ :returns: Whether the selections are identical. """
-        return rhs is not None and isinstance(rhs, Selection) and list(self) == list(rhs)
+        return rhs is not None and isinstance(rhs, Selection) and self.to_list() == rhs.to_list()
 
     def __lt__(self, rhs: Optional[Selection]) -> bool:
         """ """
-        return rhs is not None and list(self) < list(rhs)
+        return rhs is not None and self.to_list() < rhs.to_list()
 
     def __bool__(self) -> bool:
         """ The selection is ``True`` when not empty. """
@@ -2336,6 +2997,68 @@ class Selection:
         for r in regions:
             self.add(r)
 
+    def to_list(self) -> list[Region]:
+        """
+        :returns: All the regions in the selection, as a list.
+        """
+        view_id = self.view_id
+        get = sublime_api.view_selection_get
+        return [get(view_id, i) for i in range(sublime_api.view_selection_size(view_id))]
+
+    def to_array(self) -> array.array:
+        """
+        :returns: All the regions in the selection packed into an
+                  ``array('q')`` of alternating ``a`` and ``b`` values.
+        """
+        packed = array.array('q')
+        for r in self.to_list():
+            packed.append(r.a)
+            packed.append(r.b)
+        return packed
+
+    def set(self, regions: Iterable[Region | Point] | array.array):
+        """
+        Replace the whole selection with the provided regions.
+
+        :param regions:
+            An iterable of `Region` or `Point` values, or an ``array('q')`` of
+            alternating ``a`` and ``b`` values as returned by `to_array()`.
+        """
+        view_id = self.view_id
+        sublime_api.view_selection_clear(view_id)
+
+        if isinstance(regions, array.array):
+            add_region = sublime_api.view_selection_add_region
+            for i in range(0, len(regions) - 1, 2):
+                add_region(view_id, regions[i], regions[i + 1], -1)
+            return
+
+        # Adding in sorted order means each region is appended, rather than
+        # merged into the middle of the existing selection
+        regions = sorted(r if isinstance(r, Region) else Region(r) for r in regions)
+        add_region = sublime_api.view_selection_add_region
+        for r in regions:
+            add_region(view_id, r.a, r.b, r.xpos)
+
+    def replace_all(self, regions: Iterable[Region | Point] | array.array):
+        """
+        Same as `set()`, but the selection is left untouched if it already
+        consists of exactly the provided regions, including their
+        `Region.xpos`. Use this for motions that
+        frequently leave the selection where it was.
+        """
+        # Region equality ignores xpos, so compare it explicitly: setting
+        # the selection resets a stale xpos even if the positions are the same
+        current = [(r.a, r.b, r.xpos) for r in self.to_list()]
+        if isinstance(regions, array.array):
+            wanted = [(regions[i], regions[i + 1], -1) for i in range(0, len(regions) - 1, 2)]
+        else:
+            regions = sorted(r if isinstance(r, Region) else Region(r) for r in regions)
+            wanted = [(r.a, r.b, r.xpos) for r in regions]
+        if wanted == current:
+            return
+        self.set(regions)
+
     def subtract(self, region: Region):
         """
         Subtract a region from the selection, such that the whole region is no
@@ -2537,6 +3260,272 @@ class ContextStackFrame:
                 f' {self.source_file!r}, {self.source_location!r})')
 
 
+class _ViewBatches(threading.local):
+    """
+    The open `ViewBatch` of each view, kept per thread, so a batch only
+    queues changes made by the thread that opened it.
+    """
+
+    def __init__(self):
+        self.by_view: dict[int, ViewBatch] = {}
+
+
+_view_batches = _ViewBatches()
+
+
+class ViewBatch:
+    """
+    Queues decoration changes made to a `View` so they are sent to Sublime Text
+    together once the outermost batch is exited. See `View.batch`.
+
+    Repeated changes to the same regions key or status key only send the last
+    value. Reads through `View.get_regions` and `View.get_status` see the
+    queued values.
+    """
+
+    def __init__(self, view_id: int):
+        self.view_id = view_id
+        self.depth = 0
+        self.regions: dict[str, Optional[tuple]] = {}
+        self.status: dict[str, Optional[str]] = {}
+        self.erased_phantoms: set[str] = set()
+
+    def __repr__(self) -> str:
+        return f'ViewBatch({self.view_id!r})'
+
+    def __enter__(self) -> ViewBatch:
+        if self.depth == 0:
+            _view_batches.by_view[self.view_id] = self
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth == 0:
+            del _view_batches.by_view[self.view_id]
+            self.flush()
+
+    def flush(self):
+        """ Send all queued changes to Sublime Text. """
+        regions = self.regions
+        status = self.status
+        erased_phantoms = self.erased_phantoms
+        self.regions = {}
+        self.status = {}
+        self.erased_phantoms = set()
+
+        for key in erased_phantoms:
+            sublime_api.view_erase_phantoms(self.view_id, key)
+
+        for key, args in regions.items():
+            if args is None:
+                sublime_api.view_erase_regions(self.view_id, key)
+            else:
+                sublime_api.view_add_regions(self.view_id, key, *args)
+
+        for key, value in status.items():
+            if value is None:
+                sublime_api.view_erase_status(self.view_id, key)
+            else:
+                sublime_api.view_set_status(self.view_id, key, value)
+
+    def flush_phantoms(self, key: str):
+        """
+        Send a queued `View.erase_phantoms` for ``key``, so phantoms added
+        afterwards aren't erased with it.
+        """
+        if key in self.erased_phantoms:
+            self.erased_phantoms.discard(key)
+            sublime_api.view_erase_phantoms(self.view_id, key)
+
+
+class TextSnapshot:
+    """
+    An immutable copy of the text of a `View` at a particular
+    `View.change_count()`. Reading characters, lines and row/column
+    information from a snapshot doesn't call into Sublime Text. See
+    `View.snapshot`.
+    """
+
+    __slots__ = ['text', 'change_count', '_line_starts']
+
+    def __init__(self, text: str, change_count: int):
+        self.text: str = text
+        """ The contents of the view. """
+        self.change_count: int = change_count
+        """ The `View.change_count()` the snapshot was taken at. """
+        self._line_starts: Optional[array.array] = None
+
+    def __repr__(self) -> str:
+        return f'TextSnapshot(<{len(self.text)} characters>, change_count={self.change_count!r})'
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __getitem__(self, index: int | slice) -> str:
+        """ Index or slice the text like a ``str``. """
+        return self.text[index]
+
+    def size(self) -> int:
+        """ Same as `View.size`. """
+        return len(self.text)
+
+    def substr(self, x: Region | Point) -> str:
+        """ Same as `View.substr`. """
+        if isinstance(x, Region):
+            return self.text[x.begin():x.end()]
+        if x < 0 or x >= len(self.text):
+            # S2 backwards compat, as with View.substr
+            return "\x00"
+        return self.text[x]
+
+    def line_starts(self) -> array.array:
+        """
+        :returns: An ``array('q')`` with the `Point` each line starts at. This
+                  is built on first use.
+        """
+        if self._line_starts is None:
+            starts = array.array('q', [0])
+            text = self.text
+            find = text.find
+            i = find('\n')
+            while i != -1:
+                starts.append(i + 1)
+                i = find('\n', i + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_count(self) -> int:
+        """ :returns: The number of lines in the text. """
+        return len(self.line_starts())
+
+    def rowcol(self, tp: Point) -> tuple[int, int]:
+        """ Same as `View.rowcol`. """
+        tp = max(0, min(tp, len(self.text)))
+        starts = self.line_starts()
+        row = bisect.bisect_right(starts, tp) - 1
+        return (row, tp - starts[row])
+
+    def text_point(self, row: int, col: int, *, clamp_column=False) -> Point:
+        """ Same as `View.text_point`. """
+        starts = self.line_starts()
+        row = max(0, min(row, len(starts) - 1))
+        start = starts[row]
+        if clamp_column:
+            col = max(0, min(col, self._line_end(row) - start))
+        return max(0, min(start + col, len(self.text)))
+
+    def rowcol_many(self, points: Iterable[Point]) -> tuple[array.array, array.array]:
+        """ Same as `View.rowcol_many`. """
+        return self._rowcols(points, None)
+
+    def rowcol_many_utf8(self, points: Iterable[Point]) -> tuple[array.array, array.array]:
+        """ Same as `View.rowcol_many_utf8`. """
+        return self._rowcols(points, 'utf-8')
+
+    def rowcol_many_utf16(self, points: Iterable[Point]) -> tuple[array.array, array.array]:
+        """ Same as `View.rowcol_many_utf16`. """
+        return self._rowcols(points, 'utf-16-le')
+
+    def text_point_many(self, rows: Iterable[int], cols: Iterable[int], *, clamp_column=False) -> array.array:
+        """ Same as `View.text_point_many`. """
+        return self._text_points(rows, cols, clamp_column, None)
+
+    def text_point_many_utf8(self, rows: Iterable[int], cols: Iterable[int], *, clamp_column=False) -> array.array:
+        """ Same as `View.text_point_many_utf8`. """
+        return self._text_points(rows, cols, clamp_column, 'utf-8')
+
+    def text_point_many_utf16(self, rows: Iterable[int], cols: Iterable[int], *, clamp_column=False) -> array.array:
+        """ Same as `View.text_point_many_utf16`. """
+        return self._text_points(rows, cols, clamp_column, 'utf-16-le')
+
+    def _rowcols(self, points, encoding):
+        text = self.text
+        size = len(text)
+        starts = self.line_starts()
+        bisect_right = bisect.bisect_right
+        unit = 2 if encoding == 'utf-16-le' else 1
+        rows = array.array('q')
+        cols = array.array('q')
+        for tp in points:
+            tp = max(0, min(tp, size))
+            row = bisect_right(starts, tp) - 1
+            start = starts[row]
+            rows.append(row)
+            if encoding is None:
+                cols.append(tp - start)
+            else:
+                prefix = text[start:tp]
+                if prefix.isascii():
+                    cols.append(tp - start)
+                else:
+                    cols.append(len(prefix.encode(encoding, 'surrogatepass')) // unit)
+        return rows, cols
+
+    def _text_points(self, rows, cols, clamp_column, encoding):
+        text = self.text
+        size = len(text)
+        starts = self.line_starts()
+        last_row = len(starts) - 1
+        unit = 2 if encoding == 'utf-16-le' else 1
+        points = array.array('q')
+        for row, col in zip(rows, cols):
+            row = max(0, min(row, last_row))
+            start = starts[row]
+            if encoding is not None or clamp_column:
+                line = text[start:self._line_end(row)]
+                if encoding is not None and col > 0 and not line.isascii():
+                    encoded = line.encode(encoding, 'surrogatepass')
+                    if col * unit < len(encoded):
+                        # A column in the middle of a character rounds up to
+                        # the end of it, as with View.text_point_utf8
+                        chars = len(encoded[:col * unit].decode(encoding, 'ignore'))
+                        if len(line[:chars].encode(encoding, 'surrogatepass')) < col * unit:
+                            chars += 1
+                        col = chars
+                    else:
+                        col = len(line) + col - len(encoded) // unit
+                if clamp_column:
+                    col = max(0, min(col, len(line)))
+            points.append(max(0, min(start + col, size)))
+        return points
+
+    def _line_end(self, row: int) -> Point:
+        starts = self.line_starts()
+        if row + 1 < len(starts):
+            return starts[row + 1] - 1
+        return len(self.text)
+
+    def line(self, x: Region | Point) -> Region:
+        """ Same as `View.line`. """
+        if isinstance(x, Region):
+            return Region(self.line(x.begin()).a, self.line(x.end()).b)
+        row, _ = self.rowcol(x)
+        return Region(self.line_starts()[row], self._line_end(row))
+
+    def full_line(self, x: Region | Point) -> Region:
+        """ Same as `View.full_line`. """
+        r = self.line(x)
+        if r.b < len(self.text):
+            return Region(r.a, r.b + 1)
+        return r
+
+    def lines(self, region: Region) -> list[Region]:
+        """ Same as `View.lines`. """
+        first, _ = self.rowcol(region.begin())
+        last, _ = self.rowcol(region.end())
+        starts = self.line_starts()
+        return [Region(starts[row], self._line_end(row)) for row in range(first, last + 1)]
+
+
+_view_snapshots: collections.OrderedDict[int, TextSnapshot] = collections.OrderedDict()
+_view_snapshots_lock = threading.Lock()
+_VIEW_SNAPSHOT_CACHE_SIZE = 8
+_SNAPSHOT_CONVERSION_THRESHOLD = 64
+""" Below this many coordinates the ``View.*_many`` conversions call into
+Sublime Text per point rather than copying the buffer for a snapshot. """
+
+
 class View:
     """
     Represents a view into a text `Buffer`.
@@ -2546,10 +3535,25 @@ class View:
     `View.clones()` or `Buffer.views()`.
     """
 
+    def __new__(cls, *args, **kwargs):
+        # While a View object for an id is alive, constructing another returns
+        # the same object, so events for a view share one wrapper. Subclasses
+        # may take other arguments, and are never shared
+        if cls is View:
+            id = args[0] if args else kwargs.get('id')
+            view = _view_wrappers.get(id)
+            if view is not None:
+                return view
+        return super().__new__(cls)
+
     def __init__(self, id):
+        if 'view_id' in self.__dict__:
+            return
         self.view_id = id
         self.selection = Selection(id)
         self.settings_object = None
+        if type(self) is View:
+            _view_wrappers[id] = self
 
     def __len__(self) -> int:
         return self.size()
@@ -2558,7 +3562,7 @@ class View:
         return self.view_id
 
     def __eq__(self, other: object) -> bool:
-        return isinstance(other, View) and other.view_id == self.view_id
+        return self is other or (isinstance(other, View) and other.view_id == self.view_id)
 
     def __bool__(self) -> bool:
         return self.view_id != 0
@@ -2637,6 +3641,24 @@ class View:
         """
         return sublime_api.view_buffer_id(self.view_id) != 0
 
+    def batch(self) -> ViewBatch:
+        """
+        Group decoration changes into a single update. Calls to `add_regions`,
+        `erase_regions`, `set_status`, `erase_status` and `erase_phantoms`
+        made inside the ``with`` block are queued and sent when the outermost
+        batch for this view exits::
+
+            with view.batch():
+                for key, regions in results.items():
+                    view.add_regions(key, regions, "invalid")
+                view.set_status("lint", f"{len(results)} errors")
+
+        `add_phantom` is sent immediately, since the phantom id must be
+        returned. A batch only queues changes made by the thread that opened
+        it, changes made by other threads meanwhile are sent immediately.
+        """
+        return _view_batches.by_view.get(self.view_id) or ViewBatch(self.view_id)
+
     def is_primary(self) -> bool:
         """
         :returns: Whether view is the primary view into a `Buffer`. Will only be
@@ -2854,6 +3876,32 @@ class View:
             else:
                 return s
 
+    def snapshot(self) -> TextSnapshot:
+        """
+        Get an immutable `TextSnapshot` of the view's text. The most recent
+        snapshots are cached per view, so calling this repeatedly without
+        modifying the buffer only costs a `change_count()` call.
+
+        Taking a new snapshot copies the whole buffer, so prefer `substr` for
+        a handful of reads, and for commands that modify the buffer between
+        reads.
+        """
+        change_count = sublime_api.view_change_count(self.view_id)
+        with _view_snapshots_lock:
+            snapshot = _view_snapshots.get(self.view_id)
+            if snapshot is not None and snapshot.change_count == change_count:
+                _view_snapshots.move_to_end(self.view_id)
+                return snapshot
+
+        text = sublime_api.view_cached_substr(self.view_id, 0, sublime_api.view_size(self.view_id))
+        snapshot = TextSnapshot(text, change_count)
+        with _view_snapshots_lock:
+            _view_snapshots[self.view_id] = snapshot
+            _view_snapshots.move_to_end(self.view_id)
+            while len(_view_snapshots) > _VIEW_SNAPSHOT_CACHE_SIZE:
+                _view_snapshots.popitem(last=False)
+        return snapshot
+
     def find(self, pattern: str, start_pt: Point, flags=FindFlags.NONE) -> Region:
         """
         :param pattern: The regex or literal pattern to search by.
@@ -2885,6 +3933,42 @@ class View:
                     extractions.append(contents)
             return ret
 
+    def iter_find_all(self, pattern: str, flags=FindFlags.NONE, *, start_pt: Point = 0,
+                      limit: Optional[int] = None) -> Iterator[Region]:
+        """
+        Like `find_all`, but yields the regions one at a time as they are
+        found, without building the whole list. Stopping the iteration early
+        stops the search, and memory use doesn't depend on the number of
+        matches, so this suits huge buffers. It can be used from the async
+        thread.
+
+        Edits made to the view while iterating are not accounted for: later
+        regions are found in the modified text.
+
+        :param pattern: The regex or literal pattern to search by.
+        :param flags: Controls various behaviors of find. See `FindFlags`.
+                      `FindFlags.REVERSE` and `FindFlags.WRAP` are ignored.
+        :param start_pt: The `Point` to start searching from.
+        :param limit: The most regions to yield, or ``None`` for no limit.
+        """
+        flags &= ~(FindFlags.REVERSE | FindFlags.WRAP)
+        count = 0
+        pt = start_pt
+        while limit is None or count < limit:
+            region = sublime_api.view_find(self.view_id, pattern, pt, flags)
+            if region is None or region.a < 0:
+                return
+
+            count += 1
+            yield region
+
+            pt = region.end()
+            if region.empty():
+                # Step past an empty match, so it isn't found again
+                pt += 1
+                if pt > sublime_api.view_size(self.view_id):
+                    return
+
     def settings(self) -> Settings:
         """
         :returns: The view's `Settings` object. Any changes to it will be
@@ -2895,6 +3979,17 @@ class View:
 
         return self.settings_object
 
+    def cached_settings(self) -> SettingsCache:
+        """
+        :returns: A `SettingsCache` for the view's `Settings`, shared by all
+                  `View` objects for this view. Use this for settings read
+                  on every keystroke or selection change.
+        """
+        cache = _view_settings_caches.get(self.view_id)
+        if cache is None:
+            cache = _view_settings_caches[self.view_id] = SettingsCache(self.settings())
+        return cache
+
     def meta_info(self, key: str, pt: Point) -> Value:
         """
         Look up the preference ``key`` for the scope at the provided `Point`
@@ -2913,6 +4008,66 @@ class View:
         """
         return sublime_api.view_extract_tokens_with_scopes(self.view_id, region.begin(), region.end())
 
+    def iter_tokens_with_scopes(self, region: Region, *, limit: Optional[int] = None,
+                                chunk_size=65536) -> Iterator[tuple[Region, str]]:
+        """
+        Like `extract_tokens_with_scopes`, but yields the tokens one at a time,
+        fetching them in chunks of about ``chunk_size`` characters. Stopping
+        the iteration early skips the rest of the region, and memory use is
+        bounded by the chunk size, so this suits huge buffers. It can be used
+        from the async thread.
+
+        Chunks end at line boundaries where possible, since tokens don't span
+        lines. A token split by a chunk ending mid-line is joined back
+        together.
+
+        :param region: The region from which to extract tokens and scopes.
+        :param limit: The most tokens to yield, or ``None`` for no limit.
+        :param chunk_size: The number of characters to fetch the tokens of at
+                           once.
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        end = min(region.end(), sublime_api.view_size(self.view_id))
+        a = max(0, region.begin())
+        count = 0
+        held = None
+        # Where the previous chunk was cut in the middle of a line
+        split = None
+        while a < end:
+            b = min(a + chunk_size, end)
+            mid_line = False
+            if b < end:
+                line = sublime_api.view_full_line_from_point(self.view_id, b)
+                if line.b <= a + chunk_size * 4:
+                    b = min(line.b, end)
+                else:
+                    mid_line = line.a != b
+
+            for token, scope in sublime_api.view_extract_tokens_with_scopes(self.view_id, a, b):
+                if held is not None:
+                    last = held[0].b
+                    if token.b <= last:
+                        continue
+                    if token.a < last:
+                        # Only yield the part not yielded with the last chunk
+                        token = Region(last, token.b)
+                    if split == a and last == a and token.a == a and scope == held[1]:
+                        held = (Region(held[0].a, token.b), scope)
+                        continue
+
+                    yield held
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+                held = (token, scope)
+            split = b if mid_line else None
+            a = b
+
+        if held is not None:
+            yield held
+
     def extract_scope(self, pt: Point) -> Region:
         """
         :returns: The extent of the syntax scope name assigned to the character
@@ -2953,6 +4108,55 @@ class View:
         """
         return sublime_api.view_match_selector(self.view_id, pt, selector)
 
+    def scope_name_many(self, points: Iterable[Point]) -> list[str]:
+        """
+        Get the scope names of many points at once, as with `scope_name`.
+
+        Nearby points are grouped, and the scopes of each group are read with
+        a single `extract_tokens_with_scopes` call, so scanning a region only
+        calls into Sublime Text once or a few times.
+
+        :returns: The scope names, in the order of ``points``.
+        """
+        points = list(points)
+        names = [''] * len(points)
+        size = sublime_api.view_size(self.view_id)
+
+        inside = sorted((pt, i) for i, pt in enumerate(points) if 0 <= pt < size)
+        for i, pt in enumerate(points):
+            if not 0 <= pt < size:
+                names[i] = sublime_api.view_scope_name(self.view_id, pt)
+
+        bisect_right = bisect.bisect_right
+        n = 0
+        while n < len(inside):
+            # Group points that are at most SCOPE_GROUP_GAP apart
+            end = n + 1
+            while end < len(inside) and inside[end][0] - inside[end - 1][0] <= SCOPE_GROUP_GAP:
+                end += 1
+
+            tokens = sublime_api.view_extract_tokens_with_scopes(
+                self.view_id, inside[n][0], inside[end - 1][0] + 1)
+            starts = [region.begin() for region, _ in tokens]
+            for pt, i in inside[n:end]:
+                t = bisect_right(starts, pt) - 1
+                if t >= 0 and pt < tokens[t][0].end():
+                    names[i] = tokens[t][1]
+                else:
+                    names[i] = sublime_api.view_scope_name(self.view_id, pt)
+            n = end
+
+        return names
+
+    def match_selector_many(self, points: Iterable[Point], selector: str | Selector) -> list[bool]:
+        """
+        :param selector: The selector, either a string or a `Selector`.
+        :returns: Whether the selector matches each of the points, in the
+                  order of ``points``. See `scope_name_many`.
+        """
+        match = _selector(selector).match
+        return [match(name) for name in self.scope_name_many(points)]
+
     def score_selector(self, pt: Point, selector: str) -> int:
         """
         Equivalent to::
@@ -3163,6 +4367,102 @@ class View:
         """
         return sublime_api.view_text_point_utf16(self.view_id, row, col, clamp_column)
 
+    def rowcol_many(self, points: Iterable[Point]) -> tuple[array.array, array.array]:
+        """
+        Calculates the 0-based line and column numbers of many points at once,
+        as with `rowcol`. Many points are converted on a `snapshot` of the
+        view, so it only calls into Sublime Text when the buffer has changed
+        since the last snapshot. A few are converted with one `rowcol` call
+        each unless the view's snapshot is already current.
+
+        :returns: ``(rows, cols)``, two ``array('q')`` in the order of ``points``.
+        """
+        return self._rowcols(points, 'rowcol_many', sublime_api.view_row_col)
+
+    def rowcol_many_utf8(self, points: Iterable[Point]) -> tuple[array.array, array.array]:
+        """
+        Same as `rowcol_many`, with columns as UTF-8 code units.
+        """
+        return self._rowcols(points, 'rowcol_many_utf8', sublime_api.view_row_col_utf8)
+
+    def rowcol_many_utf16(self, points: Iterable[Point]) -> tuple[array.array, array.array]:
+        """
+        Same as `rowcol_many`, with columns as UTF-16 code units.
+        """
+        return self._rowcols(points, 'rowcol_many_utf16', sublime_api.view_row_col_utf16)
+
+    def text_point_many(self, rows: Iterable[int], cols: Iterable[int], *, clamp_column=False) -> array.array:
+        """
+        Calculates the character offsets of many ``row`` and ``col`` pairs at
+        once, as with `text_point`. Like `rowcol_many` this works on a
+        `snapshot` of the view when there are many pairs.
+
+        :param rows: The 0-based rows, as a list, ``array`` or other iterable.
+        :param cols: The 0-based columns, in Unicode characters.
+        :param clamp_column:
+            Whether each column should be restricted to valid values for its
+            row.
+        :returns: An ``array('q')`` of points in the order of ``rows``.
+        """
+        return self._text_points(rows, cols, clamp_column, 'text_point_many', sublime_api.view_text_point)
+
+    def text_point_many_utf8(self, rows: Iterable[int], cols: Iterable[int], *, clamp_column=False) -> array.array:
+        """
+        Same as `text_point_many`, with columns as UTF-8 code units.
+        """
+        return self._text_points(rows, cols, clamp_column, 'text_point_many_utf8', sublime_api.view_text_point_utf8)
+
+    def text_point_many_utf16(self, rows: Iterable[int], cols: Iterable[int], *, clamp_column=False) -> array.array:
+        """
+        Same as `text_point_many`, with columns as UTF-16 code units.
+        """
+        return self._text_points(rows, cols, clamp_column, 'text_point_many_utf16', sublime_api.view_text_point_utf16)
+
+    def _conversion_snapshot(self, count: int) -> Optional[TextSnapshot]:
+        """
+        :returns: The `TextSnapshot` to convert ``count`` coordinates on, or
+                  ``None`` when calling into Sublime Text per coordinate is
+                  cheaper than copying the buffer.
+
+        :meta private:
+        """
+        if count >= _SNAPSHOT_CONVERSION_THRESHOLD:
+            return self.snapshot()
+        change_count = sublime_api.view_change_count(self.view_id)
+        with _view_snapshots_lock:
+            snapshot = _view_snapshots.get(self.view_id)
+        if snapshot is not None and snapshot.change_count == change_count:
+            return snapshot
+        return None
+
+    def _rowcols(self, points, method, api_call):
+        """ :meta private: """
+        if not isinstance(points, (list, tuple, array.array)):
+            points = list(points)
+        snapshot = self._conversion_snapshot(len(points))
+        if snapshot is not None:
+            return getattr(snapshot, method)(points)
+
+        rows = array.array('q')
+        cols = array.array('q')
+        for tp in points:
+            row, col = api_call(self.view_id, tp)
+            rows.append(row)
+            cols.append(col)
+        return rows, cols
+
+    def _text_points(self, rows, cols, clamp_column, method, api_call):
+        """ :meta private: """
+        if not isinstance(rows, (list, tuple, array.array)):
+            rows = list(rows)
+        snapshot = self._conversion_snapshot(len(rows))
+        if snapshot is not None:
+            return getattr(snapshot, method)(rows, cols, clamp_column=clamp_column)
+
+        return array.array('q', [
+            api_call(self.view_id, row, col, clamp_column)
+            for row, col in zip(rows, cols)])
+
     def utf8_code_units(self, tp: Point = None) -> int:
         """
         Calculates the utf8 code unit offset at the given text point.
@@ -3309,7 +4609,7 @@ class View:
         else:
             return sublime_api.view_unfold_regions(self.view_id, x)
 
-    def add_regions(self, key: str, regions: list[Region], scope="",
+    def add_regions(self, key: str, regions: list[Region] | RegionSet, scope="",
                     icon="", flags=RegionFlags.NONE, annotations: list[str] = [],
                     annotation_color="",
                     on_navigate: Optional[Callable[[str], None]] = None,
@@ -3325,6 +4625,7 @@ class View:
             already exists for this key they will be overridden. See
             `get_regions`.
         :param regions: The list of regions to add. These should not overlap.
+            May also be a `RegionSet`.
         :param scope:
             An optional string used to source a color to draw the regions in.
             The scope is matched against the color scheme. Examples include:
@@ -3380,26 +4681,59 @@ class View:
         if len(annotations) != 0 and len(annotations) != len(regions):
             raise ValueError("region and annotation length mismatch")
 
+        if isinstance(regions, RegionSet):
+            regions = regions.to_list()
+
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None:
+            batch.regions[key] = (
+                regions, scope, icon, flags, annotations, annotation_color, on_navigate, on_close)
+            return
+
         sublime_api.view_add_regions(
             self.view_id, key, regions, scope, icon, flags, annotations, annotation_color, on_navigate, on_close)
 
-    def get_regions(self, key: str) -> list[Region]:
+    def get_regions(self, key: str, *, region_set=False) -> list[Region] | RegionSet:
         """
+        :param region_set: Whether to return the regions as a `RegionSet`.
         :returns: The regions associated with the given ``key``, if any.
         """
-        return sublime_api.view_get_regions(self.view_id, key)
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None and key in batch.regions:
+            args = batch.regions[key]
+            regions = [] if args is None else list(args[0])
+        else:
+            regions = sublime_api.view_get_regions(self.view_id, key)
+
+        if region_set:
+            return RegionSet(regions)
+        return regions
 
     def erase_regions(self, key: str):
         """
         Remove the regions associated with the given ``key``.
         """
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None:
+            batch.regions[key] = None
+            return
+
         sublime_api.view_erase_regions(self.view_id, key)
 
     def add_phantom(self, key: str, region: Region, content: str, layout: PhantomLayout,
                     on_navigate: Optional[Callable[[str], None]] = None) -> int:
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None:
+            batch.flush_phantoms(key)
+
         return sublime_api.view_add_phantom(self.view_id, key, region, content, layout, on_navigate)
 
     def erase_phantoms(self, key: str):
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None:
+            batch.erased_phantoms.add(key)
+            return
+
         sublime_api.view_erase_phantoms(self.view_id, key)
 
     def erase_phantom_by_id(self, pid: int):
@@ -3490,6 +4824,11 @@ class View:
         status bar, in a comma separated list of all status values, ordered by
         key. Setting the ``value`` to ``""`` will clear the status.
         """
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None:
+            batch.status[key] = value
+            return
+
         sublime_api.view_set_status(self.view_id, key, value)
 
     def get_status(self, key: str) -> str:
@@ -3498,10 +4837,19 @@ class View:
 
         See `set_status()`.
         """
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None and key in batch.status:
+            return batch.status[key] or ""
+
         return sublime_api.view_get_status(self.view_id, key)
 
     def erase_status(self, key: str):
         """ Clear the status associated with the provided ``key``. """
+        batch = _view_batches.by_view.get(self.view_id)
+        if batch is not None:
+            batch.status[key] = None
+            return
+
         sublime_api.view_erase_status(self.view_id, key)
 
     def extract_completions(self, prefix: str, tp: Point = -1) -> list[str]:
@@ -3675,14 +5023,29 @@ class Buffer:
     .. since:: 4081
     """
 
+    def __new__(cls, *args, **kwargs):
+        # While a Buffer object for an id is alive, constructing another
+        # returns the same object. Subclasses may take other arguments, and
+        # are never shared
+        if cls is Buffer:
+            id = args[0] if args else kwargs.get('id')
+            buffer = _buffer_wrappers.get(id)
+            if buffer is not None:
+                return buffer
+        return super().__new__(cls)
+
     def __init__(self, id):
+        if 'buffer_id' in self.__dict__:
+            return
         self.buffer_id = id
+        if type(self) is Buffer:
+            _buffer_wrappers[id] = self
 
     def __hash__(self) -> int:
         return self.buffer_id
 
     def __eq__(self, other: object) -> bool:
-        return isinstance(other, Buffer) and self.buffer_id == other.buffer_id
+        return self is other or (isinstance(other, Buffer) and self.buffer_id == other.buffer_id)
 
     def __repr__(self) -> str:
         return f'Buffer({self.buffer_id!r})'
@@ -3721,6 +5084,65 @@ class Buffer:
         return View(sublime_api.buffer_primary_view(self.buffer_id))
 
 
+class _SettingsBatches(threading.local):
+    """
+    The open `SettingsBatch` of each `Settings` object, kept per thread, so
+    a batch only defers changes made by the thread that opened it.
+    """
+
+    def __init__(self):
+        self.by_settings: dict[int, SettingsBatch] = {}
+
+
+_settings_batches = _SettingsBatches()
+
+
+class SettingsBatch:
+    """
+    Defers change notifications for a `Settings` object until the outermost
+    batch is exited, then runs each registered ``add_on_change`` callback once.
+    See `Settings.batch`.
+    """
+
+    def __init__(self, settings_id: int):
+        self.settings_id = settings_id
+        self.depth = 0
+        self.keys: set[str] = set()
+        """ The keys set or erased through the API during the batch. """
+        self.pending: dict[Callable, tuple[Callable, bool]] = {}
+
+    def __repr__(self) -> str:
+        return f'SettingsBatch({self.settings_id!r})'
+
+    def __enter__(self) -> SettingsBatch:
+        if self.depth == 0:
+            _settings_batches.by_settings[self.settings_id] = self
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth == 0:
+            del _settings_batches.by_settings[self.settings_id]
+            self.notify()
+
+    def notify(self):
+        """ Run the callbacks whose notifications were deferred. """
+        keys = frozenset(self.keys)
+        pending = self.pending
+        self.keys = set()
+        self.pending = {}
+
+        for callback, with_keys in pending.values():
+            try:
+                if with_keys:
+                    callback(keys)
+                else:
+                    callback()
+            except Exception:
+                traceback.print_exc()
+
+
 class Settings:
     """
     A ``dict`` like object that a settings hierarchy.
@@ -3746,6 +5168,7 @@ class Settings:
 
         .. since:: 4023 3.8
         """
+        self._record_change(key)
         sublime_api.settings_set(self.settings_id, key, value)
 
     def __delitem__(self, key: str):
@@ -3756,6 +5179,7 @@ class Settings:
 
         .. since:: 4078 3.8
         """
+        self._record_change(key)
         sublime_api.settings_erase(self.settings_id, key)
 
     def __contains__(self, key: str) -> bool:
@@ -3787,6 +5211,7 @@ class Settings:
         """
         if sublime_api.settings_has(self.settings_id, key):
             return sublime_api.settings_get(self.settings_id, key)
+        self._record_change(key)
         sublime_api.settings_set(self.settings_id, key, value)
         return value
 
@@ -3801,20 +5226,45 @@ class Settings:
         * An object that iterates over key/value pairs
         * Keyword arguments, ie. ``update(**kwargs)``.
 
+        Change callbacks are run once after all keys have been set. See
+        `batch()`.
+
         .. since:: 4078 3.8
         """
-        if isinstance(other, collections.abc.Mapping):
-            for key in other:
-                self[key] = other[key]
-        elif hasattr(other, 'keys'):
-            for key in other.keys():
-                self[key] = other[key]
-        else:
-            for key, value in other:
+        with self.batch():
+            if isinstance(other, collections.abc.Mapping):
+                for key in other:
+                    self[key] = other[key]
+            elif hasattr(other, 'keys'):
+                for key in other.keys():
+                    self[key] = other[key]
+            else:
+                for key, value in other:
+                    self[key] = value
+
+            for key, value in kwargs.items():
                 self[key] = value
 
-        for key, value in kwargs.items():
-            self[key] = value
+    def batch(self) -> SettingsBatch:
+        """
+        Group changes so that callbacks registered with `add_on_change` run
+        once, after the outermost batch for these settings exits::
+
+            with settings.batch():
+                settings.set("tab_size", 2)
+                settings.set("translate_tabs_to_spaces", True)
+
+        Callbacks registered with ``with_keys=True`` receive the set of keys
+        that were changed. A batch only defers changes made by the thread
+        that opened it, changes made by other threads meanwhile notify
+        immediately.
+        """
+        return _settings_batches.by_settings.get(self.settings_id) or SettingsBatch(self.settings_id)
+
+    def _record_change(self, key: str):
+        batch = _settings_batches.by_settings.get(self.settings_id)
+        if batch is not None:
+            batch.keys.add(key)
 
     def get(self, key: str, default: Value = None) -> Value:
         if default is not None:
@@ -3828,21 +5278,39 @@ class Settings:
 
     def set(self, key: str, value: Value):
         """ Same as `__setitem__`. """
+        self._record_change(key)
         sublime_api.settings_set(self.settings_id, key, value)
 
     def erase(self, key: str):
         """ Same as `__delitem__`. """
+        self._record_change(key)
         sublime_api.settings_erase(self.settings_id, key)
 
-    def add_on_change(self, tag: str, callback: Callable[[], None]):
+    def add_on_change(self, tag: str, callback: Callable[[], None] | Callable[[Optional[frozenset[str]]], None],
+                      *, with_keys=False):
         """
         Register a callback to be run whenever a setting is changed.
 
         :param tag: A string associated with the callback. For use with
                     `clear_on_change`.
         :param callback: A callable object to be run when a setting is changed.
-        """
-        sublime_api.settings_add_on_change(self.settings_id, tag, callback)
+        :param with_keys:
+            Whether ``callback`` is passed the ``frozenset`` of changed keys.
+            The keys are only known for changes made within a `batch()`,
+            otherwise ``None`` is passed.
+        """
+        settings_id = self.settings_id
+
+        def on_change():
+            batch = _settings_batches.by_settings.get(settings_id)
+            if batch is not None:
+                batch.pending[on_change] = (callback, with_keys)
+            elif with_keys:
+                callback(None)
+            else:
+                callback()
+
+        sublime_api.settings_add_on_change(settings_id, tag, on_change)
 
     def clear_on_change(self, tag: str):
         """
@@ -3852,6 +5320,109 @@ class Settings:
         sublime_api.settings_clear_on_change(self.settings_id, tag)
 
 
+class SettingsCache:
+    """
+    A read-through cache in front of a `Settings` object. Repeated reads of a
+    key are served from memory until any setting changes, including changes
+    made inside a `Settings.batch`.
+
+    Use `View.cached_settings()` to get the shared cache for a view, or
+    construct one directly for other settings objects and call `detach()`
+    once it's no longer needed.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings: Settings = settings
+        """ The `Settings` object being cached. """
+        self.hits = 0
+        """ The number of reads served from the cache. """
+        self.misses = 0
+        """ The number of reads that had to query the settings. """
+        self._values: dict[str, Value] = {}
+        self._present: dict[str, bool] = {}
+        self._tag = f'SettingsCache({id(self)})'
+        # Registered directly rather than through Settings.add_on_change, so
+        # the cache is invalidated straight away even inside a
+        # Settings.batch(), where observers are deferred
+        sublime_api.settings_add_on_change(settings.settings_id, self._tag, self.invalidate)
+
+    def __repr__(self) -> str:
+        return f'SettingsCache({self.settings!r})'
+
+    def __getitem__(self, key: str) -> Value:
+        """ Same as `Settings.__getitem__`. """
+        res = self.get(key)
+        if res is None and key not in self:
+            raise KeyError(repr(key))
+        return res
+
+    def __contains__(self, key: str) -> bool:
+        """ Same as `Settings.__contains__`. """
+        try:
+            res = self._present[key]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            res = self._present[key] = sublime_api.settings_has(self.settings.settings_id, key)
+        return res
+
+    def get(self, key: str, default: Value = None) -> Value:
+        """ Same as `Settings.get`. """
+        try:
+            res = self._values[key]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            res = self._values[key] = sublime_api.settings_get(self.settings.settings_id, key)
+        if res is None:
+            return default
+        if isinstance(res, (list, dict)):
+            # Settings.get returns a new object each time, so callers may
+            # modify it; the cached value must not be affected
+            return copy.deepcopy(res)
+        return res
+
+    def has(self, key: str) -> bool:
+        """ Same as `__contains__`. """
+        return key in self
+
+    def invalidate(self):
+        """ Drop all cached values. Called whenever a setting changes. """
+        self._values = {}
+        self._present = {}
+
+    def detach(self):
+        """ Stop listening for changes to the settings. """
+        self.settings.clear_on_change(self._tag)
+        self.invalidate()
+
+    def hit_rate(self) -> float:
+        """
+        :returns: The fraction of reads served from the cache, or ``0.0`` if
+                  there have been no reads.
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def stats(self) -> dict[str, Value]:
+        """
+        :returns: A ``dict`` with the ``"hits"``, ``"misses"`` and
+                  ``"hit_rate"`` of the cache.
+        """
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate()}
+
+
+_view_settings_caches: dict[int, SettingsCache] = {}
+
+
+def _drop_view_settings_cache(view_id: int):
+    cache = _view_settings_caches.pop(view_id, None)
+    if cache is not None:
+        cache.detach()
+
+
 class Phantom:
     """
     Represents an `minihtml`-based decoration to display non-editable content
@@ -3860,7 +5431,8 @@ class Phantom:
     the `View`, changes to the attributes will have no effect.
     """
 
-    def __init__(self, region: Region, content: str, layout: PhantomLayout, on_navigate: Callable[[str], None] = None):
+    def __init__(self, region: Region, content: str, layout: PhantomLayout, on_navigate: Callable[[str], None] = None,
+                 *, key: Optional[str] = None, content_hash: Optional[int] = None):
         self.region: Region = region
         """
         The `Region` associated with the phantom. The phantom is displayed at
@@ -3875,6 +5447,17 @@ class Phantom:
         Called when a link in the HTML is clicked. The value of the ``href``
         attribute is passed.
         """
+        self.key: Optional[str] = key
+        """
+        An optional identifier that is stable across calls to
+        `PhantomSet.update`, such as a diagnostic id. Phantoms with a key are
+        matched by key instead of by region and content.
+        """
+        self.content_hash: Optional[int] = content_hash
+        """
+        An optional hash of ``content`` provided by the caller. When set, it is
+        compared instead of the content itself in `PhantomSet.update`.
+        """
         self.id: int | None = None
 
     def __eq__(self, rhs: object) -> bool:
@@ -3884,8 +5467,11 @@ class Phantom:
                 self.layout == rhs.layout and self.on_navigate == rhs.on_navigate)
 
     def __repr__(self) -> str:
+        if self.key is None:
+            return (f'Phantom({self.region!r}, {self.content!r}, '
+                    f'{self.layout!r}, on_navigate={self.on_navigate!r})')
         return (f'Phantom({self.region!r}, {self.content!r}, '
-                f'{self.layout!r}, on_navigate={self.on_navigate!r})')
+                f'{self.layout!r}, on_navigate={self.on_navigate!r}, key={self.key!r})')
 
     def to_tuple(self) -> tuple[tuple[Point, Point], str, PhantomLayout, Optional[Callable[[str], None]]]:
         """
@@ -3897,6 +5483,27 @@ class Phantom:
         """
         return (self.region.to_tuple(), self.content, self.layout, self.on_navigate)
 
+    def _content_hash(self) -> int:
+        if self.content_hash is not None:
+            return self.content_hash
+        # str caches its own hash, so this is cheap for repeated content
+        return hash(self.content)
+
+    def _update_key(self):
+        if self.key is not None:
+            return self.key
+        return (self.region.to_tuple(), self._content_hash(), self.layout, self.on_navigate)
+
+    def _unchanged_from(self, old: Phantom) -> bool:
+        if self.region.to_tuple() != old.region.to_tuple():
+            return False
+        if self.layout != old.layout or self.on_navigate != old.on_navigate:
+            return False
+        if self._content_hash() != old._content_hash():
+            return False
+        # Without a caller provided hash, guard against hash collisions
+        return self.content_hash is not None or self.content == old.content
+
 
 class PhantomSet:
     """
@@ -3929,33 +5536,44 @@ class PhantomSet:
         Update the set of phantoms. If the `Phantom.region` of existing phantoms
         have changed they will be moved; new phantoms are added and ones not
         present are removed.
+
+        Phantoms with a `Phantom.key` are matched to existing phantoms by key,
+        others by their region, layout, callback and content. Only phantoms
+        that were added, removed or changed are sent to the `View`.
         """
-        new_phantoms = {p.to_tuple(): p for p in phantoms}
+        new_phantoms = {p._update_key(): p for p in phantoms}
 
         # Update the list of phantoms that exist in the text buffer with their
         # current location
-        regions = self.view.query_phantoms([p.id for p in self.phantoms])  # type: ignore
-        for phantom, region in zip(self.phantoms, regions):
-            phantom.region = region
+        if self.phantoms:
+            regions = self.view.query_phantoms([p.id for p in self.phantoms])  # type: ignore
+            for phantom, region in zip(self.phantoms, regions):
+                phantom.region = region
 
-        current_phantoms = {p.to_tuple(): p for p in self.phantoms}
+        current_phantoms = {p._update_key(): p for p in self.phantoms}
 
+        kept_ids = set()
+        added = []
         for key, p in new_phantoms.items():
-            try:
+            old = current_phantoms.get(key)
+            if old is not None and old.id not in kept_ids and p._unchanged_from(old):
                 # Phantom already exists, copy the id from the current one
-                p.id = current_phantoms[key].id
-            except KeyError:
-                p.id = self.view.add_phantom(
-                    self.key, p.region, p.content, p.layout, p.on_navigate)
-
-        new_phantom_ids = set([p.id for p in new_phantoms.values()])
+                p.id = old.id
+                kept_ids.add(p.id)
+            else:
+                added.append(p)
 
+        # Erase before adding, so a changed phantom never shows twice
         for p in self.phantoms:
             # if the region is -1, then it's already been deleted, no need to
             # call erase
-            if p.id not in new_phantom_ids and p.region != Region(-1):
+            if p.id not in kept_ids and p.region != Region(-1):
                 self.view.erase_phantom_by_id(p.id)  # type: ignore
 
+        for p in added:
+            p.id = self.view.add_phantom(
+                self.key, p.region, p.content, p.layout, p.on_navigate)
+
         self.phantoms = [p for p in new_phantoms.values()]
 
 
@@ -4017,6 +5635,107 @@ class CompletionList:
             self.target.completions_ready(completions, flags)
 
 
+_interned_kinds: dict[Kind, Kind] = {}
+_MAX_INTERNED_KINDS = 1024
+
+
+def _intern_kind(kind: Kind) -> Kind:
+    """
+    :returns: A shared tuple equal to ``kind``, so that items of the same kind
+              don't each keep their own copy.
+
+    :meta private:
+    """
+    if type(kind) is not tuple:
+        return kind
+    interned = _interned_kinds.get(kind)
+    if interned is None:
+        if len(_interned_kinds) >= _MAX_INTERNED_KINDS:
+            return kind
+        interned = _interned_kinds[kind] = kind
+    return interned
+
+
+def _intern_details(details: Any) -> Any:
+    """
+    :returns: ``details`` interned if it's a string, so that items with the
+              same details share a single string.
+
+    :meta private:
+    """
+    if type(details) is str:
+        return sys.intern(details)
+    return details
+
+
+class FrozenCompletionList(CompletionList):
+    """
+    An immutable `CompletionList`, for a fixed set of completions that's
+    created once and returned from every `EventListener.on_query_completions`
+    call, like a list of keywords or entities.
+
+    The completions are sorted by trigger when the list is created. For each
+    request only the completions whose trigger starts with the first
+    ``prefix_length`` characters of the prefix are passed to Sublime Text,
+    found by bisecting the sorted triggers, rather than the whole list.
+    Sublime Text only shows completions starting with the prefix's first
+    character, so the default of ``1`` doesn't change the completions shown.
+    """
+
+    def __init__(self, completions: list[CompletionValue], flags=AutoCompleteFlags.NONE, prefix_length=1):
+        """
+        :param completions: The completions.
+        :param flags: Flags controlling auto-complete behavior. See `AutoCompleteFlags`.
+        :param prefix_length:
+            How many characters of the prefix to filter the completions by,
+            case-insensitively. ``0`` passes all completions on every request.
+        """
+        if isinstance(completions, CompletionItemArray):
+            keys = [trigger.lower() for trigger in completions.triggers]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            super().__init__(completions.take(order), flags)
+            self._keys = [keys[i] for i in order]
+        else:
+            keyed = sorted(((_completion_trigger(c).lower(), c) for c in completions), key=lambda kc: kc[0])
+            super().__init__([c for _, c in keyed], flags)
+            self._keys = [k for k, _ in keyed]
+        self.prefix_length = prefix_length
+
+    def __repr__(self) -> str:
+        return (f'FrozenCompletionList(<{len(self.completions)} completions>, '
+                f'flags={self.flags!r}, prefix_length={self.prefix_length!r})')
+
+    def set_completions(self, completions: list[CompletionValue], flags=AutoCompleteFlags.NONE):
+        raise TypeError('FrozenCompletionList is immutable')
+
+    def completions_for(self, prefix: str) -> list[CompletionValue]:
+        """
+        :returns: The completions that may match ``prefix``, in trigger order.
+        """
+        if not prefix or not self.prefix_length:
+            return self.completions
+
+        key = prefix[:self.prefix_length].lower()
+        keys = self._keys
+        lo = bisect.bisect_left(keys, key)
+        hi = bisect.bisect_left(keys, key + '\U0010ffff', lo)
+        return self.completions[lo:hi]
+
+
+def _completion_trigger(completion: CompletionValue) -> str:
+    """
+    :returns: The trigger of a completion in any of the forms accepted by
+              `CompletionList`.
+
+    :meta private:
+    """
+    if isinstance(completion, CompletionItem):
+        return completion.trigger
+    if not isinstance(completion, str):
+        completion = completion[0] if completion else ''
+    return completion.split('\t', 1)[0]
+
+
 class CompletionItem:
     """
     Represents an available auto-completion item.
@@ -4055,9 +5774,9 @@ class CompletionItem:
         """
         self.completion_format: CompletionFormat = completion_format
         """ The format of the completion. See `CompletionFormat`. """
-        self.kind: Kind = kind
+        self.kind: Kind = _intern_kind(kind)
         """ The kind of the completion. See `Kind`. """
-        self.details: str = details
+        self.details: str = _intern_details(details)
         """
         An optional `minihtml` description of the completion, shown in the
         detail pane at the bottom of the auto complete window.
@@ -4135,6 +5854,127 @@ class CompletionItem:
             details)
 
 
+class CompletionItemArray:
+    """
+    A list of completion items stored as columns, for building large lists
+    of completions cheaply::
+
+        items = sublime.CompletionItemArray(kind=sublime.KIND_KEYWORD, details="CSS keyword")
+        for keyword in keywords:
+            items.append(keyword)
+        return sublime.CompletionList(items)
+
+    Each item is a trigger and a completion appended to two lists. The other
+    fields default to the values given to the constructor, and a column is
+    only stored per item once an item is appended with a different value.
+    Indexing or iterating creates the `CompletionItem` objects on demand.
+
+    Sublime Text is always passed `CompletionItem` objects, so returning a
+    whole array from ``on_query_completions`` costs as much as returning a
+    list of items. The array pays off when kept in a `FrozenCompletionList`,
+    which sorts and filters the columns and only creates the items that
+    match the prefix.
+    """
+
+    __slots__ = ['triggers', 'completions', '_defaults', '_columns']
+
+    FIELDS = ('annotation', 'completion_format', 'kind', 'details', 'flags')
+    """ The fields that can be shared by all items. """
+
+    def __init__(
+            self,
+            annotation="",
+            completion_format=CompletionFormat.TEXT,
+            kind=KIND_AMBIGUOUS,
+            details="",
+            flags=CompletionItemFlags.NONE):
+        self.triggers: list[str] = []
+        """ The trigger of each item. """
+        self.completions: list[str] = []
+        """ The completion of each item. """
+        self._defaults = {
+            'annotation': annotation,
+            'completion_format': completion_format,
+            'kind': _intern_kind(kind),
+            'details': _intern_details(details),
+            'flags': flags,
+        }
+        self._columns: dict[str, list] = {}
+
+    def __repr__(self) -> str:
+        return f'CompletionItemArray(<{len(self.triggers)} items>)'
+
+    def __len__(self) -> int:
+        return len(self.triggers)
+
+    def __getitem__(self, index: int | slice) -> CompletionItem | list[CompletionItem]:
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self.triggers)))]
+        if index < 0:
+            index += len(self.triggers)
+        if not 0 <= index < len(self.triggers):
+            raise IndexError('CompletionItemArray index out of range')
+        return self._item(index)
+
+    def __iter__(self) -> Iterator[CompletionItem]:
+        return (self._item(i) for i in range(len(self.triggers)))
+
+    def append(self, trigger: str, completion="", **fields):
+        """
+        Add an item.
+
+        :param trigger: Text to match against the user's input.
+        :param completion: Text to insert, or ``""`` to insert the trigger.
+        :param fields: Values of the `FIELDS` for this item, when different
+                       from the values given to the constructor.
+        """
+        n = len(self.triggers)
+        self.triggers.append(trigger)
+        self.completions.append(completion)
+
+        columns = self._columns
+        for name, column in columns.items():
+            column.append(self._defaults[name])
+        for name, value in fields.items():
+            default = self._defaults[name]
+            if name == 'kind':
+                value = _intern_kind(value)
+            elif name == 'details':
+                value = _intern_details(value)
+            if value == default:
+                continue
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [default] * (n + 1)
+            column[n] = value
+
+    def take(self, indexes: Iterable[int]) -> CompletionItemArray:
+        """
+        :returns: A new `CompletionItemArray` with the items at ``indexes``,
+                  in that order.
+        """
+        indexes = list(indexes)
+        result = CompletionItemArray.__new__(CompletionItemArray)
+        result.triggers = [self.triggers[i] for i in indexes]
+        result.completions = [self.completions[i] for i in indexes]
+        result._defaults = self._defaults
+        result._columns = {
+            name: [column[i] for i in indexes] for name, column in self._columns.items()}
+        return result
+
+    def _item(self, i: int) -> CompletionItem:
+        # The stored kinds and details are already interned, so the item is
+        # filled in directly rather than through CompletionItem.__init__
+        item = CompletionItem.__new__(CompletionItem)
+        item.trigger = self.triggers[i]
+        item.completion = self.completions[i]
+        columns = self._columns
+        for name, value in self._defaults.items():
+            column = columns.get(name)
+            setattr(item, name, value if column is None else column[i])
+        return item
+
+
 def list_syntaxes() -> list[Syntax]:
     """ list all known syntaxes.
 
@@ -4226,13 +6066,13 @@ class QuickPanelItem:
     def __init__(self, trigger: str, details="", annotation="", kind=KIND_AMBIGUOUS):
         self.trigger: str = trigger
         """ Text to match against user's input. """
-        self.details: str | list[str] | tuple[str] = details
+        self.details: str | list[str] | tuple[str] = _intern_details(details)
         """
         A `minihtml` string or list of strings displayed below the trigger.
         """
         self.annotation: str = annotation
         """ Hint to draw to the right-hand side of the row. """
-        self.kind: Kind = kind
+        self.kind: Kind = _intern_kind(kind)
         """ The kind of the item. See `Kind`. """
 
     def __repr__(self) -> str:
@@ -4256,13 +6096,13 @@ class ListInputItem:
         """ Text to match against the user's input. """
         self.value: Any = value
         """ A `Value` passed to the command if the row is selected. """
-        self.details: str | list[str] | tuple[str] = details
+        self.details: str | list[str] | tuple[str] = _intern_details(details)
         """
         A `minihtml` string or list of strings displayed below the trigger.
         """
         self.annotation: str = annotation
         """ Hint to draw to the right-hand side of the row. """
-        self.kind: Kind = kind
+        self.kind: Kind = _intern_kind(kind)
         """ The kind of the item. See `Kind`. """
 
     def __repr__(self) -> str:
@@ -0,0 +1,1979 @@
+"""
+A headless, pure-Python stand-in for the ``sublime_api`` module that Sublime
+Text builds in, so `sublime` and `sublime_plugin` can load real packages and
+dispatch events outside the editor - for benchmarks and tests on a machine
+without a display.
+
+It models windows, buffers, views, selections, settings, regions, phantoms,
+status keys and completions, and drives the same `sublime_plugin` entry
+points the editor does. It does not model anything visual, and has no syntax
+highlighting: every point has the base scope of the view's syntax. The
+functions listed in `UNSUPPORTED` raise ``NotImplementedError`` when called.
+
+Timeouts, including async ones, run on the calling thread when
+`process_events` is called, so runs are deterministic.
+
+Install it before importing `sublime`::
+
+    import sublime_api_headless
+    sublime_api_headless.install(packages_path='/path/to/Packages')
+
+    import sublime
+    import sublime_plugin
+
+    sublime_plugin.reload_plugin('Default.sort')
+    sublime_api_headless.api_ready()
+
+    view = sublime.active_window().new_file()
+    view.run_command('insert', {'characters': 'b\\na\\n'})
+    view.run_command('select_all')
+    view.run_command('sort_lines')
+    sublime_api_headless.process_events()
+
+:meta private:
+"""
+
+import bisect
+import copy
+import fnmatch
+import heapq
+import itertools
+import json
+import os
+import re
+import sys
+
+__all__ = [
+    'install', 'reset', 'api_ready', 'process_events', 'query_completions',
+    'apply_edit', 'set_selection',
+]
+
+packages_path_ = ''
+installed_packages_path_ = ''
+cache_path_ = ''
+
+messages = []
+""" ``(kind, text)`` for every status, error and dialog message shown. """
+
+builtin_text_commands = {}
+""" Text commands implemented by the stand-in, by name. """
+
+_ids = itertools.count(1)
+_windows = {}
+_buffers = {}
+_views = {}
+_settings = {}
+_named_settings = {}
+_timeouts = []
+_timeout_seq = itertools.count()
+_now = 0
+_clipboard = ''
+_api_ready = False
+_completions = {}
+_completion_ids = itertools.count(1)
+_syntaxes = None
+
+
+def install(packages_path=None, installed_packages_path=None, cache_path=None):
+    """
+    Register this module as ``sublime_api``. Must be called before `sublime`
+    is imported.
+
+    :param packages_path:
+        The Packages folder to load settings, resources and syntaxes from.
+        Defaults to the ``Packages`` folder next to ``Lib``.
+    """
+    global packages_path_, installed_packages_path_, cache_path_
+
+    import importlib.abc  # noqa: F401, sublime_plugin expects these loaded
+    import importlib.util  # noqa: F401
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    packages_path_ = packages_path or os.path.join(root, 'Packages')
+    installed_packages_path_ = installed_packages_path or os.path.join(root, 'Installed Packages')
+    cache_path_ = cache_path or os.path.join(root, 'Cache')
+
+    if packages_path_ not in sys.path:
+        sys.path.append(packages_path_)
+
+    sys.modules['sublime_api'] = sys.modules[__name__]
+    reset()
+
+
+def reset():
+    """
+    Close everything and start again with a single empty window. Loaded
+    plugins are kept.
+    """
+    global _now, _api_ready, _syntaxes
+
+    _windows.clear()
+    _buffers.clear()
+    _views.clear()
+    _settings.clear()
+    _named_settings.clear()
+    _timeouts.clear()
+    _completions.clear()
+    messages.clear()
+    _now = 0
+    _api_ready = False
+    _syntaxes = None
+
+    _new_window()
+
+
+def api_ready():
+    """
+    Tell `sublime_plugin` the API is ready, which calls ``plugin_loaded``
+    and attaches listeners, as happens on startup.
+    """
+    global _api_ready
+    _api_ready = True
+    _plugin().on_api_ready()
+    process_events()
+
+
+def process_events(ms=0):
+    """
+    Advance the clock by ``ms`` milliseconds and run every timeout that is
+    due, including ones scheduled while running.
+
+    :returns: The number of callbacks run.
+    """
+    global _now
+
+    until = _now + ms
+    count = 0
+    while _timeouts and _timeouts[0][0] <= until:
+        due, _, callback = heapq.heappop(_timeouts)
+        _now = max(_now, due)
+        callback()
+        count += 1
+    _now = until
+    return count
+
+
+def query_completions(view_id, prefix, locations):
+    """
+    Ask the plugins for completions, like the editor does when the
+    auto-complete popup is shown.
+
+    :returns:
+        ``(completions, flags)``, or ``None`` if a plugin still hasn't
+        provided its completions once pending timeouts have run.
+    """
+    req_id = next(_completion_ids)
+    _plugin().on_query_completions(view_id, req_id, prefix, locations)
+    process_events()
+    return _completions.pop(req_id, None)
+
+
+def apply_edit(view_id, a, b, text):
+    """
+    Replace the text between ``a`` and ``b`` without running a command, as
+    if the user typed it. Text change listeners are notified, but
+    ``on_modified`` is not called, so the caller can dispatch it.
+    """
+    view = _views[view_id]
+    view.edit_depth += 1
+    try:
+        _modify(view, a, b, text)
+    finally:
+        view.edit_depth -= 1
+    view.buffer.pending, changes = [], view.buffer.pending
+    for v in view.buffer.views:
+        v.modified = False
+    if changes:
+        for listener in list(view.buffer.listeners.values()):
+            if hasattr(listener, 'on_text_changed'):
+                listener.on_text_changed(changes)
+
+
+def set_selection(view_id, regions):
+    """
+    Replace the selection with ``(a, b)`` pairs, without calling
+    ``on_selection_modified``.
+    """
+    view = _views[view_id]
+    size = len(view.buffer.text)
+    view.sel = [[max(0, min(a, size)), max(0, min(b, size)), -1] for a, b in regions]
+    _normalize_selection(view)
+    view.selection_modified = False
+
+
+def _plugin():
+    return sys.modules['sublime_plugin']
+
+
+def _sublime():
+    return sys.modules['sublime']
+
+
+def _emit(name, *args):
+    if _api_ready and 'sublime_plugin' in sys.modules:
+        getattr(_plugin(), name)(*args)
+
+
+def _emit_async(name, *args):
+    if _api_ready and 'sublime_plugin' in sys.modules:
+        set_timeout_async(lambda: getattr(_plugin(), name)(*args), 0)
+
+
+# Models
+
+
+class _SettingsStore:
+    __slots__ = ['id', 'values', 'parent', 'children', 'callbacks']
+
+    def __init__(self, values=None, parent=None):
+        self.id = next(_ids)
+        self.values = values if values is not None else {}
+        self.parent = parent
+        self.children = []
+        self.callbacks = []
+        if parent is not None:
+            parent.children.append(self)
+        _settings[self.id] = self
+
+    def lookup(self, key):
+        s = self
+        while s is not None:
+            if key in s.values:
+                return True, s.values[key]
+            s = s.parent
+        return False, None
+
+    def changed(self):
+        for _, callback in list(self.callbacks):
+            callback()
+        for child in self.children:
+            child.changed()
+
+
+class _Buffer:
+    __slots__ = [
+        'id', 'text', 'file_name', 'name', 'change_count', 'saved_change_count',
+        'views', 'listeners', 'pending', 'scratch', 'read_only', 'encoding',
+        'line_endings', 'line_starts', 'line_starts_count',
+    ]
+
+    def __init__(self, text=''):
+        self.id = next(_ids)
+        self.text = text
+        self.file_name = ''
+        self.name = ''
+        self.change_count = 0
+        self.saved_change_count = 0
+        self.views = []
+        self.listeners = {}
+        self.pending = []
+        self.scratch = False
+        self.read_only = False
+        self.encoding = 'UTF-8'
+        self.line_endings = 'Unix'
+        self.line_starts = None
+        self.line_starts_count = -1
+        _buffers[self.id] = self
+
+    def starts(self):
+        if self.line_starts_count != self.change_count:
+            starts = [0]
+            find = self.text.find
+            i = find('\n')
+            while i != -1:
+                starts.append(i + 1)
+                i = find('\n', i + 1)
+            self.line_starts = starts
+            self.line_starts_count = self.change_count
+        return self.line_starts
+
+
+class _View:
+    __slots__ = [
+        'id', 'buffer', 'window_id', 'sel', 'settings', 'regions', 'status',
+        'phantoms', 'edit_depth', 'modified', 'selection_modified',
+        'panel_name', 'overwrite',
+    ]
+
+    def __init__(self, buffer, window_id, panel_name=None):
+        self.id = next(_ids)
+        self.buffer = buffer
+        self.window_id = window_id
+        self.sel = [[0, 0, -1]]
+        self.settings = _SettingsStore(parent=_preferences())
+        self.regions = {}
+        self.status = {}
+        self.phantoms = {}
+        self.edit_depth = 0
+        self.modified = False
+        self.selection_modified = False
+        self.panel_name = panel_name
+        self.overwrite = False
+        buffer.views.append(self)
+        _views[self.id] = self
+
+
+class _Window:
+    __slots__ = ['id', 'views', 'active_view', 'settings', 'template_settings',
+                 'panels', 'active_panel', 'project_data', 'project_file_name',
+                 'quick_panel']
+
+    def __init__(self):
+        self.id = next(_ids)
+        self.views = []
+        self.active_view = 0
+        self.settings = _SettingsStore()
+        self.template_settings = _SettingsStore()
+        self.panels = {}
+        self.active_panel = None
+        self.project_data = None
+        self.project_file_name = ''
+        self.quick_panel = None
+        _windows[self.id] = self
+
+
+def _new_window():
+    w = _Window()
+    return w.id
+
+
+def _preferences():
+    return _settings[load_settings('Preferences.sublime-settings')]
+
+
+def _view(view_id):
+    return _views.get(view_id)
+
+
+def _region(a, b, xpos=-1):
+    return _sublime().Region(a, b, xpos)
+
+
+def _new_view(window, text='', panel_name=None):
+    buf = _Buffer(text)
+    view = _View(buf, window.id, panel_name)
+    if panel_name is None:
+        window.views.append(view.id)
+        window.active_view = view.id
+    _emit('on_new_buffer', buf.id)
+    _emit_async('on_new_buffer_async', buf.id)
+    _emit('on_new', view.id)
+    _emit_async('on_new_async', view.id)
+    _emit('attach_view', view.id)
+    return view
+
+
+def _close_view(view):
+    _emit('on_pre_close', view.id)
+    window = _windows.get(view.window_id)
+    if window is not None:
+        if view.id in window.views:
+            window.views.remove(view.id)
+        if window.active_view == view.id:
+            window.active_view = window.views[-1] if window.views else 0
+    view.buffer.views.remove(view)
+    del _views[view.id]
+    _emit('on_close', view.id)
+    _emit('detach_view', view.id)
+    if not view.buffer.views:
+        _emit('on_close_buffer', view.buffer.id)
+        del _buffers[view.buffer.id]
+
+
+# Application
+
+
+def version():
+    return '4200'
+
+
+def channel():
+    return 'dev'
+
+
+def platform():
+    return {'darwin': 'osx', 'win32': 'windows'}.get(sys.platform, 'linux')
+
+
+def architecture():
+    return 'x64'
+
+
+def executable_path():
+    return sys.executable
+
+
+def packages_path():
+    return packages_path_
+
+
+def installed_packages_path():
+    return installed_packages_path_
+
+
+def cache_path():
+    return cache_path_
+
+
+def log_message(msg):
+    sys.__stdout__.write(msg)
+
+
+def status_message(msg):
+    messages.append(('status', msg))
+
+
+def error_message(msg):
+    messages.append(('error', msg))
+
+
+def message_dialog(msg):
+    messages.append(('message', msg))
+
+
+def ok_cancel_dialog(msg, ok_title='', title=''):
+    messages.append(('ok_cancel', msg))
+    return True
+
+
+def yes_no_cancel_dialog(msg, yes_title='', no_title='', title=''):
+    messages.append(('yes_no_cancel', msg))
+    return 1
+
+
+def set_timeout(callback, delay=0):
+    heapq.heappush(_timeouts, (_now + max(0, delay), next(_timeout_seq), callback))
+
+
+def set_timeout_async(callback, delay=0):
+    set_timeout(callback, delay)
+
+
+def get_clipboard(size_limit=16777216):
+    return _clipboard[:size_limit]
+
+
+def get_clipboard_async(callback, size_limit=16777216):
+    set_timeout(lambda: callback(_clipboard[:size_limit]))
+
+
+def set_clipboard(text):
+    global _clipboard
+    _clipboard = text
+
+
+def active_window():
+    for window_id in _windows:
+        return window_id
+    return 0
+
+
+def windows():
+    return list(_windows)
+
+
+def buffers():
+    return list(_buffers)
+
+
+def run_command(cmd, args=None):
+    for obj, name in _plugin().create_application_commands():
+        if name == cmd:
+            obj.run_('', args or {})
+            return
+
+
+def can_accept_input(cmd, args):
+    return False
+
+
+def get_macro():
+    return []
+
+
+def ui_info():
+    return {}
+
+
+# Values and resources
+
+
+def _strip_json_comments(data):
+    out = []
+    i = 0
+    n = len(data)
+    while i < n:
+        c = data[i]
+        if c == '"':
+            j = i + 1
+            while j < n and data[j] != '"':
+                j += 2 if data[j] == '\\' else 1
+            out.append(data[i:j + 1])
+            i = j + 1
+        elif data.startswith('//', i):
+            j = data.find('\n', i)
+            i = n if j == -1 else j
+        elif data.startswith('/*', i):
+            j = data.find('*/', i + 2)
+            i = n if j == -1 else j + 2
+        else:
+            out.append(c)
+            i += 1
+    return re.sub(r',(\s*[\]}])', r'\1', ''.join(out))
+
+
+def decode_value(data):
+    try:
+        return json.loads(_strip_json_comments(data)), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def encode_value(value, pretty=False, update_text=None):
+    if pretty or update_text is not None:
+        return json.dumps(value, indent=4)
+    return json.dumps(value)
+
+
+def expand_variables(value, variables):
+    def expand(s):
+        def replace(m):
+            name = m.group(1) or m.group(2)
+            default = m.group(3)
+            if name in variables:
+                return variables[name]
+            return default if default is not None else ''
+        return re.sub(r'\$(?:(\w+)|\{(\w+)(?::([^}]*))?\})', replace, s)
+
+    if isinstance(value, str):
+        return expand(value)
+    if isinstance(value, list):
+        return [expand_variables(v, variables) for v in value]
+    if isinstance(value, dict):
+        return {k: expand_variables(v, variables) for k, v in value.items()}
+    return value
+
+
+def _resource_path(name):
+    if not name.startswith('Packages/'):
+        return None
+    return os.path.join(packages_path_, *name[len('Packages/'):].split('/'))
+
+
+def find_resources(pattern):
+    results = []
+    for root, dirs, files in os.walk(packages_path_):
+        dirs.sort()
+        for f in sorted(files):
+            if not pattern or fnmatch.fnmatchcase(f, pattern):
+                rel = os.path.relpath(os.path.join(root, f), packages_path_)
+                results.append('Packages/' + rel.replace(os.sep, '/'))
+    return results
+
+
+def load_binary_resource(name):
+    path = _resource_path(name)
+    if path is None or not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def load_resource(name):
+    data = load_binary_resource(name)
+    if data is None:
+        return None
+    return data.decode('utf-8').replace('\r\n', '\n')
+
+
+def _load_syntaxes():
+    global _syntaxes
+    if _syntaxes is None:
+        sublime = _sublime()
+        _syntaxes = []
+        for path in find_resources('*.sublime-syntax'):
+            text = load_resource(path) or ''
+            name = re.search(r'^name:\s*(.+?)\s*$', text, re.M)
+            scope = re.search(r'^scope:\s*(\S+)', text, re.M)
+            hidden = re.search(r'^hidden:\s*true\b', text, re.M)
+            exts = re.search(r'^file_extensions:\s*\n((?:\s+-.*\n)+)', text, re.M)
+            syntax = sublime.Syntax(
+                path,
+                name.group(1).strip('\'"') if name else os.path.basename(path).rsplit('.', 1)[0],
+                bool(hidden),
+                scope.group(1) if scope else 'text.plain')
+            extensions = []
+            if exts:
+                extensions = [e.strip().lstrip('-').strip().strip('\'"')
+                              for e in exts.group(1).splitlines()]
+            _syntaxes.append((syntax, extensions))
+    return _syntaxes
+
+
+def list_syntaxes():
+    return [s for s, _ in _load_syntaxes()]
+
+
+def get_syntax(path):
+    for s, _ in _load_syntaxes():
+        if s.path == path:
+            return s
+    return None
+
+
+def find_syntax_for_file(path, first_line):
+    name = os.path.basename(path)
+    ext = name.rsplit('.', 1)[-1] if '.' in name else name
+    return [s for s, exts in _load_syntaxes() if ext in exts or name in exts]
+
+
+def score_selector(scope_name, selector):
+    scopes = scope_name.split()
+    best = 0
+    for alternative in selector.split(','):
+        parts = re.split(r'(?:^|\s)-\s*', alternative)
+        score = _score_path(scopes, parts[0].split())
+        if score and not any(_score_path(scopes, p.split()) for p in parts[1:]):
+            best = max(best, score)
+    return best
+
+
+def _score_path(scopes, atoms):
+    if not atoms:
+        return 1
+
+    # Atoms must match scopes in order, the last one as deep as possible
+    score = 0
+    i = len(scopes) - 1
+    for atom in reversed(atoms):
+        while i >= 0:
+            scope = scopes[i]
+            if scope == atom or scope.startswith(atom + '.'):
+                score += (atom.count('.') + 1) << (3 * i)
+                i -= 1
+                break
+            i -= 1
+        else:
+            return 0
+    return score
+
+
+# Settings
+
+
+def load_settings(base_name):
+    settings_id = _named_settings.get(base_name)
+    if settings_id is None:
+        values = {}
+        for path in find_resources(base_name):
+            value, err = decode_value(load_resource(path) or '')
+            if isinstance(value, dict):
+                values.update(value)
+        settings_id = _SettingsStore(values).id
+        _named_settings[base_name] = settings_id
+    return settings_id
+
+
+def save_settings(base_name):
+    pass
+
+
+def settings_get(settings_id, key):
+    # Like Sublime Text, return a new object each time
+    return copy.deepcopy(_settings[settings_id].lookup(key)[1])
+
+
+def settings_get_default(settings_id, key, default):
+    found, value = _settings[settings_id].lookup(key)
+    return copy.deepcopy(value) if found else default
+
+
+def settings_has(settings_id, key):
+    return _settings[settings_id].lookup(key)[0]
+
+
+def settings_set(settings_id, key, value):
+    s = _settings[settings_id]
+    s.values[key] = value
+    s.changed()
+
+
+def settings_erase(settings_id, key):
+    s = _settings[settings_id]
+    if key in s.values:
+        del s.values[key]
+        s.changed()
+
+
+def settings_to_dict(settings_id):
+    chain = []
+    s = _settings[settings_id]
+    while s is not None:
+        chain.append(s.values)
+        s = s.parent
+    result = {}
+    for values in reversed(chain):
+        result.update(values)
+    return result
+
+
+def settings_add_on_change(settings_id, tag, callback):
+    _settings[settings_id].callbacks.append((tag, callback))
+
+
+def settings_clear_on_change(settings_id, tag):
+    s = _settings[settings_id]
+    s.callbacks = [(t, c) for t, c in s.callbacks if t != tag]
+
+
+# Windows
+
+
+def window_new_file(window_id, flags=0, syntax=''):
+    view = _new_view(_windows[window_id])
+    if syntax:
+        view_assign_syntax(view.id, syntax)
+    return view.id
+
+
+def window_open_file(window_id, fname, flags=0, group=-1):
+    window = _windows[window_id]
+    for view_id in window.views:
+        if _views[view_id].buffer.file_name == fname:
+            window.active_view = view_id
+            return view_id
+
+    text = ''
+    if os.path.isfile(fname):
+        with open(fname, encoding='utf-8', newline='') as f:
+            text = f.read().replace('\r\n', '\n')
+    view = _new_view(window, text)
+    view.buffer.file_name = fname
+    syntaxes = find_syntax_for_file(fname, text[:text.find('\n')])
+    if syntaxes:
+        view.settings.values['syntax'] = syntaxes[0].path
+    _emit('on_load', view.id)
+    _emit_async('on_load_async', view.id)
+    return view.id
+
+
+def window_close_file(window_id, view_id, on_close=None):
+    view = _view(view_id)
+    if view is not None:
+        _close_view(view)
+    if on_close is not None:
+        on_close(view is not None)
+    return view is not None
+
+
+def window_find_open_file(window_id, fname, group=-1):
+    for view_id in _windows[window_id].views:
+        if _views[view_id].buffer.file_name == fname:
+            return view_id
+    return 0
+
+
+def window_views(window_id, include_transient=False):
+    return list(_windows[window_id].views)
+
+
+def window_sheets(window_id):
+    return list(_windows[window_id].views)
+
+
+def window_selected_sheets(window_id):
+    active = _windows[window_id].active_view
+    return [active] if active else []
+
+
+def window_active_view(window_id):
+    window = _windows.get(window_id)
+    return window.active_view if window else 0
+
+
+def window_active_sheet(window_id):
+    return window_active_view(window_id)
+
+
+def window_active_view_in_group(window_id, group):
+    return window_active_view(window_id) if group == 0 else 0
+
+
+def window_active_sheet_in_group(window_id, group):
+    return window_active_view_in_group(window_id, group)
+
+
+def window_views_in_group(window_id, group):
+    return window_views(window_id) if group == 0 else []
+
+
+def window_sheets_in_group(window_id, group):
+    return window_views_in_group(window_id, group)
+
+
+def window_num_views_in_group(window_id, group):
+    return len(window_views_in_group(window_id, group))
+
+
+def window_num_groups(window_id):
+    return 1 if window_id in _windows else 0
+
+
+def window_active_group(window_id):
+    return 0
+
+
+def window_get_view_index(window_id, view_id):
+    views = _windows[window_id].views
+    return (0, views.index(view_id)) if view_id in views else (-1, -1)
+
+
+def window_get_sheet_index(window_id, sheet_id):
+    return window_get_view_index(window_id, sheet_id)
+
+
+def window_focus_view(window_id, view_id):
+    window = _windows[window_id]
+    if view_id in window.views and window.active_view != view_id:
+        if window.active_view:
+            _emit('on_deactivated', window.active_view)
+        window.active_view = view_id
+        _emit('on_activated', view_id)
+        _emit_async('on_activated_async', view_id)
+
+
+def window_focus_sheet(window_id, sheet_id):
+    window_focus_view(window_id, sheet_id)
+
+
+def window_run_command(window_id, cmd, args=None):
+    cmd, args = _rewrite_command('on_window_command', window_id, cmd, args)
+    for obj, name in _plugin().create_window_commands(window_id):
+        if name == cmd:
+            obj.run_('', args or {})
+            _emit('on_post_window_command', window_id, cmd, args)
+            return
+
+
+def window_settings(window_id):
+    return _windows[window_id].settings.id
+
+
+def window_template_settings(window_id):
+    return _windows[window_id].template_settings.id
+
+
+def window_create_output_panel(window_id, name, unlisted=False):
+    window = _windows[window_id]
+    view_id = window.panels.get(name)
+    if view_id is not None:
+        view = _views[view_id]
+        view.buffer.text = ''
+        view.buffer.change_count += 1
+        view.sel = [[0, 0, -1]]
+        return view_id
+    view = _new_view(window, panel_name=name)
+    window.panels[name] = view.id
+    return view.id
+
+
+def window_find_output_panel(window_id, name):
+    return _windows[window_id].panels.get(name, 0)
+
+
+def window_destroy_output_panel(window_id, name):
+    window = _windows[window_id]
+    view_id = window.panels.pop(name, None)
+    if view_id is not None:
+        _close_view(_views[view_id])
+
+
+def window_active_panel(window_id):
+    return _windows[window_id].active_panel
+
+
+def window_panels(window_id):
+    return ['output.' + name for name in _windows[window_id].panels]
+
+
+def window_show_quick_panel(window_id, items, on_select, on_highlight, flags, selected_index, placeholder):
+    _windows[window_id].quick_panel = (items, on_select, on_highlight, flags, selected_index, placeholder)
+
+
+def window_show_input_panel(window_id, caption, initial_text, on_done, on_change, on_cancel):
+    window = _windows[window_id]
+    view = _new_view(window, initial_text, panel_name='input')
+    return view.id
+
+
+def window_folders(window_id):
+    data = _windows[window_id].project_data or {}
+    return [f.get('path') for f in data.get('folders', [])]
+
+
+def window_project_file_name(window_id):
+    return _windows[window_id].project_file_name
+
+
+def window_workspace_file_name(window_id):
+    return ''
+
+
+def window_get_project_data(window_id):
+    return _windows[window_id].project_data
+
+
+def window_set_project_data(window_id, data):
+    _windows[window_id].project_data = data
+
+
+def window_extract_variables(window_id):
+    variables = {'packages': packages_path_, 'platform': platform().capitalize()}
+    view_id = window_active_view(window_id)
+    if view_id:
+        fname = _views[view_id].buffer.file_name
+        if fname:
+            base = os.path.basename(fname)
+            variables.update({
+                'file': fname,
+                'file_path': os.path.dirname(fname),
+                'file_name': base,
+                'file_base_name': base.rsplit('.', 1)[0],
+                'file_extension': base.rsplit('.', 1)[1] if '.' in base else '',
+            })
+    folders = window_folders(window_id)
+    if folders:
+        variables['folder'] = folders[0]
+    return variables
+
+
+def window_status_message(window_id, msg):
+    status_message(msg)
+
+
+def window_is_ui_element_visible(window_id, element):
+    return False
+
+
+def window_set_ui_element_visible(window_id, element, visible):
+    pass
+
+
+# Sheets, with the same id as their view
+
+
+def sheet_view(sheet_id):
+    return sheet_id if sheet_id in _views else 0
+
+
+def sheet_window(sheet_id):
+    view = _view(sheet_id)
+    return view.window_id if view else 0
+
+
+def sheet_file_name(sheet_id):
+    view = _view(sheet_id)
+    return view.buffer.file_name if view else ''
+
+
+def sheet_group(sheet_id):
+    return 0 if sheet_id in _views else -1
+
+
+def sheet_is_transient(sheet_id):
+    return False
+
+
+def sheet_is_semi_transient(sheet_id):
+    return False
+
+
+def sheet_is_selected(sheet_id):
+    view = _view(sheet_id)
+    return bool(view) and _windows[view.window_id].active_view == sheet_id
+
+
+def sheet_close(sheet_id, on_close=None):
+    view = _view(sheet_id)
+    if view is not None:
+        _close_view(view)
+    if on_close is not None:
+        on_close(view is not None)
+
+
+def sheet_set_name(sheet_id, name):
+    view_set_name(sheet_id, name)
+
+
+# Buffers
+
+
+def buffer_views(buffer_id):
+    return [v.id for v in _buffers[buffer_id].views]
+
+
+def buffer_primary_view(buffer_id):
+    buf = _buffers.get(buffer_id)
+    return buf.views[0].id if buf and buf.views else 0
+
+
+def buffer_file_name(buffer_id):
+    return _buffers[buffer_id].file_name
+
+
+def buffer_add_text_listener(buffer_id, listener):
+    key = next(_ids)
+    _buffers[buffer_id].listeners[key] = listener
+    return key
+
+
+def buffer_clear_text_listener(buffer_id, key):
+    buf = _buffers.get(buffer_id)
+    if buf is not None:
+        buf.listeners.pop(key, None)
+
+
+# Views
+
+
+def view_buffer_id(view_id):
+    view = _view(view_id)
+    return view.buffer.id if view else 0
+
+
+def view_sheet_id(view_id):
+    view = _view(view_id)
+    return view_id if view and view.panel_name is None else 0
+
+
+def view_element(view_id):
+    view = _view(view_id)
+    if view and view.panel_name is not None:
+        return 'output:output' if view.panel_name != 'input' else 'input:input'
+    return ''
+
+
+def view_window(view_id):
+    view = _view(view_id)
+    return view.window_id if view else 0
+
+
+def view_is_primary(view_id):
+    view = _view(view_id)
+    return bool(view) and view.buffer.views[0] is view
+
+
+def view_clones(view_id):
+    view = _views[view_id]
+    return [v.id for v in view.buffer.views]
+
+
+def view_file_name(view_id):
+    return _views[view_id].buffer.file_name
+
+
+def view_retarget(view_id, fname):
+    _views[view_id].buffer.file_name = fname
+
+
+def view_get_name(view_id):
+    return _views[view_id].buffer.name
+
+
+def view_set_name(view_id, name):
+    _views[view_id].buffer.name = name
+
+
+def view_is_loading(view_id):
+    return False
+
+
+def view_is_dirty(view_id):
+    buf = _views[view_id].buffer
+    return buf.change_count != buf.saved_change_count
+
+
+def view_is_read_only(view_id):
+    return _views[view_id].buffer.read_only
+
+
+def view_set_read_only(view_id, read_only):
+    _views[view_id].buffer.read_only = read_only
+
+
+def view_is_scratch(view_id):
+    return _views[view_id].buffer.scratch
+
+
+def view_set_scratch(view_id, scratch):
+    _views[view_id].buffer.scratch = scratch
+
+
+def view_encoding(view_id):
+    return _views[view_id].buffer.encoding
+
+
+def view_set_encoding(view_id, encoding):
+    _views[view_id].buffer.encoding = encoding
+
+
+def view_line_endings(view_id):
+    return _views[view_id].buffer.line_endings
+
+
+def view_set_line_endings(view_id, line_endings):
+    _views[view_id].buffer.line_endings = line_endings
+
+
+def view_settings(view_id):
+    return _views[view_id].settings.id
+
+
+def view_assign_syntax(view_id, syntax):
+    if not syntax.startswith('Packages/') and not syntax.startswith('scope:'):
+        syntax = 'Packages/' + syntax
+    if syntax.startswith('scope:'):
+        for s in list_syntaxes():
+            if s.scope == syntax[len('scope:'):]:
+                syntax = s.path
+                break
+    settings_set(_views[view_id].settings.id, 'syntax', syntax)
+
+
+def view_meta_info(view_id, key, pt):
+    return None
+
+
+def view_size(view_id):
+    view = _view(view_id)
+    return len(view.buffer.text) if view else 0
+
+
+def view_cached_substr(view_id, a, b):
+    view = _view(view_id)
+    if view is None:
+        return ''
+    if a > b:
+        a, b = b, a
+    return view.buffer.text[max(0, a):max(0, b)]
+
+
+def view_change_count(view_id):
+    view = _view(view_id)
+    return view.buffer.change_count if view else 0
+
+
+def view_change_id(view_id):
+    view = _views[view_id]
+    return (view.buffer.id, view.buffer.change_count, 0)
+
+
+def view_begin_edit(view_id, edit_token, cmd, args=None):
+    _views[view_id].edit_depth += 1
+
+
+def view_end_edit(view_id, edit_token):
+    view = _views[view_id]
+    view.edit_depth -= 1
+    if view.edit_depth == 0:
+        _flush_changes(view)
+
+
+def view_is_in_edit(view_id):
+    return _views[view_id].edit_depth > 0
+
+
+def _check_edit(view):
+    if view.edit_depth == 0:
+        raise ValueError("Edit objects may not be used after the TextCommand's run method has returned")
+
+
+def view_insert(view_id, edit_token, pt, text):
+    view = _views[view_id]
+    _check_edit(view)
+    pt = max(0, min(pt, len(view.buffer.text)))
+    _modify(view, pt, pt, text)
+    return len(text)
+
+
+def view_erase(view_id, edit_token, region):
+    view = _views[view_id]
+    _check_edit(view)
+    _modify(view, region.begin(), region.end(), '')
+
+
+def view_replace(view_id, edit_token, region, text):
+    view = _views[view_id]
+    _check_edit(view)
+    _modify(view, region.begin(), region.end(), text)
+
+
+def _historic_position(text, starts, pt):
+    sublime = _sublime()
+    row = bisect.bisect_right(starts, pt) - 1
+    prefix = text[starts[row]:pt]
+    return sublime.HistoricPosition(
+        pt, row, len(prefix),
+        len(prefix.encode('utf-16-le')) // 2, len(prefix.encode('utf-8')))
+
+
+def _adjust(p, a, b, delta):
+    if p < a:
+        return p
+    if p > b or (p == b and (a != b or delta > 0)):
+        return p + delta
+    return a
+
+
+def _modify(view, a, b, text):
+    buf = view.buffer
+    old = buf.text
+    size = len(old)
+    a = max(0, min(a, size))
+    b = max(a, min(b, size))
+    if a == b and not text:
+        return
+
+    if buf.listeners:
+        starts = buf.starts()
+        removed = old[a:b]
+        buf.pending.append(_sublime().TextChange(
+            _historic_position(old, starts, a),
+            _historic_position(old, starts, b),
+            len(removed.encode('utf-16-le')) // 2,
+            len(removed.encode('utf-8')),
+            text))
+
+    buf.text = old[:a] + text + old[b:]
+    buf.change_count += 1
+    delta = len(text) - (b - a)
+
+    for v in buf.views:
+        for r in v.sel:
+            r[0] = _adjust(r[0], a, b, delta)
+            r[1] = _adjust(r[1], a, b, delta)
+        for key, entry in v.regions.items():
+            entry[0] = [(_adjust(ra, a, b, delta), _adjust(rb, a, b, delta))
+                        for ra, rb in entry[0]]
+        for pid, entry in v.phantoms.items():
+            entry[1] = (_adjust(entry[1][0], a, b, delta), _adjust(entry[1][1], a, b, delta))
+        v.modified = True
+
+
+def _flush_changes(view):
+    buf = view.buffer
+    if buf.pending:
+        changes, buf.pending = buf.pending, []
+        for listener in list(buf.listeners.values()):
+            if hasattr(listener, 'on_text_changed'):
+                listener.on_text_changed(changes)
+            if hasattr(listener, 'on_text_changed_async'):
+                set_timeout_async(lambda l=listener: l.on_text_changed_async(changes))
+
+    for v in buf.views:
+        if v.modified:
+            v.modified = False
+            _emit('on_modified', v.id)
+            _emit_async('on_modified_async', v.id)
+    if view.selection_modified:
+        view.selection_modified = False
+        _emit('on_selection_modified', view.id)
+        _emit_async('on_selection_modified_async', view.id)
+
+
+def _rewrite_command(hook, target_id, cmd, args):
+    if _api_ready:
+        new_cmd, new_args = getattr(_plugin(), hook)(target_id, cmd, args)
+        if new_cmd:
+            return new_cmd, new_args
+    return cmd, args
+
+
+_text_commands = {}
+
+
+def view_run_command(view_id, cmd, args=None):
+    view = _views[view_id]
+    cmd, args = _rewrite_command('on_text_command', view_id, cmd, args)
+
+    builtin = builtin_text_commands.get(cmd)
+    plugin = _plugin()
+    key = (view_id, tuple(plugin.text_command_classes))
+    commands = _text_commands.get(key)
+    if commands is None:
+        commands = dict((name, obj) for obj, name in plugin.create_text_commands(view_id))
+        _text_commands[key] = commands
+    obj = commands.get(cmd)
+
+    if obj is None and builtin is None:
+        window_run_command(view.window_id, cmd, args)
+        return
+
+    if obj is not None:
+        # TextCommand.run_ begins and ends the edit itself
+        obj.run_(next(_ids), args or {})
+    else:
+        view.edit_depth += 1
+        try:
+            builtin(view, **(args or {}))
+        finally:
+            view_end_edit(view_id, 0)
+
+    _emit('on_post_text_command', view_id, cmd, args)
+
+
+def view_can_accept_input(view_id, cmd, args):
+    return False
+
+
+def view_clear_undo_stack(view_id):
+    pass
+
+
+def view_command_history(view_id, index, modifying_only=False):
+    return (None, None, 0)
+
+
+# Selection
+
+
+def _selection_key(r):
+    return (min(r[0], r[1]), max(r[0], r[1]))
+
+
+def _normalize_selection(view):
+    view.sel = _merge_selection(sorted(view.sel, key=_selection_key))
+    view.selection_modified = True
+
+
+def _merge_selection(sel):
+    """ Merge the overlapping regions of a sorted selection. """
+    merged = []
+    for r in sel:
+        begin, end = min(r[0], r[1]), max(r[0], r[1])
+        if merged:
+            last = merged[-1]
+            lbegin, lend = min(last[0], last[1]), max(last[0], last[1])
+            if begin < lend or (begin == lbegin and end == lend):
+                if end > lend:
+                    merged[-1] = [lbegin, end, -1]
+                continue
+        merged.append(r)
+    return merged
+
+
+def view_selection_size(view_id):
+    view = _view(view_id)
+    return len(view.sel) if view else 0
+
+
+def view_selection_get(view_id, i):
+    view = _view(view_id)
+    if view is None or i < 0 or i >= len(view.sel):
+        return _region(-1, -1)
+    a, b, xpos = view.sel[i]
+    return _region(a, b, xpos)
+
+
+def view_selection_erase(view_id, i):
+    view = _views[view_id]
+    del view.sel[i]
+    view.selection_modified = True
+
+
+def view_selection_clear(view_id):
+    view = _views[view_id]
+    view.sel = []
+    view.selection_modified = True
+
+
+def view_selection_add_region(view_id, a, b, xpos=-1):
+    view = _views[view_id]
+    size = len(view.buffer.text)
+    region = [max(0, min(a, size)), max(0, min(b, size)), xpos]
+
+    # The selection is kept sorted and merged, so the new region can only
+    # merge with its neighbours: insert it in order and merge around it
+    sel = view.sel
+    key = _selection_key(region)
+    lo, hi = 0, len(sel)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _selection_key(sel[mid]) <= key:
+            lo = mid + 1
+        else:
+            hi = mid
+    sel.insert(lo, region)
+
+    start = max(0, lo - 1)
+    end = max(_selection_key(r)[1] for r in sel[start:lo + 1])
+    stop = lo + 1
+    while stop < len(sel) and _selection_key(sel[stop])[0] <= end:
+        end = max(end, _selection_key(sel[stop])[1])
+        stop += 1
+    sel[start:stop] = _merge_selection(sel[start:stop])
+    view.selection_modified = True
+
+
+def view_selection_add_point(view_id, pt):
+    view_selection_add_region(view_id, pt, pt)
+
+
+def view_selection_subtract_region(view_id, a, b):
+    view = _views[view_id]
+    begin, end = min(a, b), max(a, b)
+    result = []
+    for r in view.sel:
+        rbegin, rend = min(r[0], r[1]), max(r[0], r[1])
+        if rend <= begin or rbegin >= end:
+            result.append(r)
+            continue
+        if rbegin < begin:
+            result.append([rbegin, begin, -1])
+        if rend > end:
+            result.append([end, rend, -1])
+    view.sel = result
+    view.selection_modified = True
+
+
+def view_selection_contains(view_id, a, b):
+    begin, end = min(a, b), max(a, b)
+    for r in _views[view_id].sel:
+        if min(r[0], r[1]) <= begin and end <= max(r[0], r[1]):
+            return True
+    return False
+
+
+def view_has_non_empty_selection_region(view_id):
+    return any(r[0] != r[1] for r in _views[view_id].sel)
+
+
+# Lines, rows and columns
+
+
+def _clamp(view, pt):
+    return max(0, min(pt, len(view.buffer.text)))
+
+
+def _line_bounds(buf, pt):
+    starts = buf.starts()
+    row = bisect.bisect_right(starts, pt) - 1
+    begin = starts[row]
+    end = starts[row + 1] - 1 if row + 1 < len(starts) else len(buf.text)
+    return row, begin, end
+
+
+def view_row_col(view_id, tp):
+    view = _views[view_id]
+    tp = _clamp(view, tp)
+    row, begin, _ = _line_bounds(view.buffer, tp)
+    return (row, tp - begin)
+
+
+def view_row_col_utf8(view_id, tp):
+    view = _views[view_id]
+    tp = _clamp(view, tp)
+    row, begin, _ = _line_bounds(view.buffer, tp)
+    return (row, len(view.buffer.text[begin:tp].encode('utf-8')))
+
+
+def view_row_col_utf16(view_id, tp):
+    view = _views[view_id]
+    tp = _clamp(view, tp)
+    row, begin, _ = _line_bounds(view.buffer, tp)
+    return (row, len(view.buffer.text[begin:tp].encode('utf-16-le')) // 2)
+
+
+def _text_point(view_id, row, col, clamp_column, width):
+    buf = _views[view_id].buffer
+    starts = buf.starts()
+    row = max(0, min(row, len(starts) - 1))
+    begin = starts[row]
+    end = starts[row + 1] - 1 if row + 1 < len(starts) else len(buf.text)
+    if width is not None:
+        # Convert code units to characters
+        units = 0
+        chars = 0
+        for c in buf.text[begin:end]:
+            if units >= col:
+                break
+            units += width(c)
+            chars += 1
+        col = chars + max(0, col - units)
+    if clamp_column:
+        col = max(0, min(col, end - begin))
+    return max(0, min(begin + col, len(buf.text)))
+
+
+def view_text_point(view_id, row, col, clamp_column=False):
+    return _text_point(view_id, row, col, clamp_column, None)
+
+
+def view_text_point_utf8(view_id, row, col, clamp_column=False):
+    return _text_point(view_id, row, col, clamp_column, lambda c: len(c.encode('utf-8')))
+
+
+def view_text_point_utf16(view_id, row, col, clamp_column=False):
+    return _text_point(view_id, row, col, clamp_column, lambda c: 2 if ord(c) > 0xFFFF else 1)
+
+
+def view_code_units_at(view_id, tp):
+    text = _views[view_id].buffer.text[:max(0, tp)]
+    return (len(text.encode('utf-8')), len(text.encode('utf-16-le')) // 2)
+
+
+def view_total_code_units(view_id):
+    return view_code_units_at(view_id, view_size(view_id))
+
+
+def view_line_from_point(view_id, pt):
+    view = _views[view_id]
+    _, begin, end = _line_bounds(view.buffer, _clamp(view, pt))
+    return _region(begin, end)
+
+
+def view_line_from_region(view_id, region):
+    a = view_line_from_point(view_id, region.begin())
+    b = view_line_from_point(view_id, region.end())
+    return _region(a.a, b.b)
+
+
+def view_full_line_from_point(view_id, pt):
+    r = view_line_from_point(view_id, pt)
+    if r.b < view_size(view_id):
+        return _region(r.a, r.b + 1)
+    return r
+
+
+def view_full_line_from_region(view_id, region):
+    a = view_line_from_point(view_id, region.begin())
+    b = view_full_line_from_point(view_id, region.end())
+    return _region(a.a, b.b)
+
+
+def view_lines(view_id, region):
+    view = _views[view_id]
+    buf = view.buffer
+    starts = buf.starts()
+    first, _, _ = _line_bounds(buf, _clamp(view, region.begin()))
+    last, _, _ = _line_bounds(buf, _clamp(view, region.end()))
+    lines = []
+    for row in range(first, last + 1):
+        end = starts[row + 1] - 1 if row + 1 < len(starts) else len(buf.text)
+        lines.append(_region(starts[row], end))
+    return lines
+
+
+def view_split_by_newlines(view_id, region):
+    begin, end = region.begin(), region.end()
+    return [_region(max(r.a, begin), min(r.b, end)) for r in view_lines(view_id, region)]
+
+
+def _is_word_char(view, c):
+    separators = view.settings.lookup('word_separators')[1] or ''
+    return not c.isspace() and c not in separators
+
+
+def view_word_from_point(view_id, pt):
+    view = _views[view_id]
+    text = view.buffer.text
+    pt = _clamp(view, pt)
+    a = b = pt
+    while a > 0 and _is_word_char(view, text[a - 1]):
+        a -= 1
+    while b < len(text) and _is_word_char(view, text[b]):
+        b += 1
+    return _region(a, b)
+
+
+def view_word_from_region(view_id, region):
+    a = view_word_from_point(view_id, region.begin())
+    b = view_word_from_point(view_id, region.end())
+    return _region(a.a, b.b)
+
+
+def view_classify(view_id, pt):
+    return 0
+
+
+def view_indentation_level(view_id, pt):
+    view = _views[view_id]
+    _, begin, end = _line_bounds(view.buffer, _clamp(view, pt))
+    line = view.buffer.text[begin:end]
+    tab_size = view.settings.lookup('tab_size')[1] or 4
+    indent = line[:len(line) - len(line.lstrip(' \t'))].expandtabs(tab_size)
+    return len(indent) // tab_size
+
+
+def view_visible_region(view_id):
+    return _region(0, view_size(view_id))
+
+
+def view_viewport_position(view_id):
+    return (0.0, 0.0)
+
+
+def view_viewport_extents(view_id):
+    return (800.0, 600.0)
+
+
+def view_layout_extents(view_id):
+    return (800.0, 600.0)
+
+
+def view_line_height(view_id):
+    return 16.0
+
+
+def view_em_width(view_id):
+    return 8.0
+
+
+def view_show_point(view_id, *args):
+    pass
+
+
+def view_show_region(view_id, *args):
+    pass
+
+
+def view_show_point_at_center(view_id, *args):
+    pass
+
+
+def view_show_region_at_center(view_id, *args):
+    pass
+
+
+def view_set_viewport_position(view_id, *args):
+    pass
+
+
+def view_get_overwrite_status(view_id):
+    return _views[view_id].overwrite
+
+
+def view_set_overwrite_status(view_id, value):
+    _views[view_id].overwrite = value
+
+
+def view_is_popup_visible(view_id):
+    return False
+
+
+def view_is_auto_complete_visible(view_id):
+    return False
+
+
+def view_hide_popup(view_id):
+    pass
+
+
+# Find
+
+
+def _compile(pattern, flags):
+    sublime = _sublime()
+    if flags & sublime.FindFlags.LITERAL:
+        pattern = re.escape(pattern)
+    if flags & sublime.FindFlags.WHOLEWORD:
+        pattern = r'\b(?:' + pattern + r')\b'
+    return re.compile(pattern, re.M | (re.I if flags & sublime.FindFlags.IGNORECASE else 0))
+
+
+def view_find(view_id, pattern, start_pt, flags=0):
+    sublime = _sublime()
+    text = _views[view_id].buffer.text
+    regex = _compile(pattern, flags)
+
+    if flags & sublime.FindFlags.REVERSE:
+        matches = [m for m in regex.finditer(text) if m.end() <= start_pt]
+        if not matches and flags & sublime.FindFlags.WRAP:
+            matches = list(regex.finditer(text))
+        m = matches[-1] if matches else None
+    else:
+        m = regex.search(text, max(0, start_pt))
+        if m is None and flags & sublime.FindFlags.WRAP:
+            m = regex.search(text)
+
+    if m is None:
+        return _region(-1, -1)
+    return _region(m.start(), m.end())
+
+
+def view_find_all(view_id, pattern, flags=0):
+    text = _views[view_id].buffer.text
+    return [_region(m.start(), m.end()) for m in _compile(pattern, flags).finditer(text)]
+
+
+def view_find_all_with_contents(view_id, pattern, flags, fmt):
+    text = _views[view_id].buffer.text
+    template = re.sub(r'\$(\d+)|\$\{(\d+)\}', lambda m: '\\g<' + (m.group(1) or m.group(2)) + '>', fmt)
+    return [(_region(m.start(), m.end()), m.expand(template))
+            for m in _compile(pattern, flags).finditer(text)]
+
+
+def view_find_by_selector(view_id, selector):
+    if view_match_selector(view_id, 0, selector):
+        return [_region(0, view_size(view_id))]
+    return []
+
+
+# Scopes
+
+
+def _base_scope(view):
+    path = view.settings.lookup('syntax')[1]
+    if path:
+        syntax = get_syntax(path)
+        if syntax is not None:
+            return syntax.scope
+    return 'text.plain'
+
+
+def view_scope_name(view_id, pt):
+    return _base_scope(_views[view_id]) + ' '
+
+
+def view_match_selector(view_id, pt, selector):
+    return score_selector(view_scope_name(view_id, pt), selector) > 0
+
+
+def view_score_selector(view_id, pt, selector):
+    return score_selector(view_scope_name(view_id, pt), selector)
+
+
+def view_extract_scope(view_id, pt):
+    return _region(0, view_size(view_id))
+
+
+def view_expand_to_scope(view_id, pt, selector):
+    if view_match_selector(view_id, pt, selector):
+        return _region(0, view_size(view_id))
+    return None
+
+
+def view_extract_tokens_with_scopes(view_id, a, b):
+    view = _views[view_id]
+    return [(_region(a, b), _base_scope(view) + ' ')] if a < b else []
+
+
+def view_context_backtrace(view_id, pt):
+    return []
+
+
+def view_symbol_regions(view_id):
+    return []
+
+
+def view_indexed_symbol_regions(view_id, type):
+    return []
+
+
+def view_symbols(view_id):
+    return []
+
+
+def view_indexed_symbols(view_id):
+    return []
+
+
+def view_indexed_references(view_id):
+    return []
+
+
+# Regions, status and phantoms
+
+
+def view_add_regions(view_id, key, regions, scope='', icon='', flags=0, annotations=[],
+                     annotation_color='', on_navigate=None, on_close=None):
+    _views[view_id].regions[key] = [
+        [(r.a, r.b) for r in regions], scope, icon, flags, annotations, annotation_color]
+
+
+def view_get_regions(view_id, key):
+    entry = _views[view_id].regions.get(key)
+    if entry is None:
+        return []
+    return [_region(a, b) for a, b in entry[0]]
+
+
+def view_erase_regions(view_id, key):
+    _views[view_id].regions.pop(key, None)
+
+
+def view_set_status(view_id, key, value):
+    _views[view_id].status[key] = value
+
+
+def view_get_status(view_id, key):
+    return _views[view_id].status.get(key, '')
+
+
+def view_erase_status(view_id, key):
+    _views[view_id].status.pop(key, None)
+
+
+def view_add_phantom(view_id, key, region, content, layout, on_navigate):
+    pid = next(_ids)
+    _views[view_id].phantoms[pid] = [key, (region.a, region.b), content, layout, on_navigate]
+    return pid
+
+
+def view_erase_phantom(view_id, pid):
+    _views[view_id].phantoms.pop(pid, None)
+
+
+def view_erase_phantoms(view_id, key):
+    phantoms = _views[view_id].phantoms
+    for pid in [pid for pid, entry in phantoms.items() if entry[0] == key]:
+        del phantoms[pid]
+
+
+def view_query_phantoms(view_id, pids):
+    phantoms = _views[view_id].phantoms
+    return [_region(*phantoms[pid][1]) if pid in phantoms else _region(-1, -1) for pid in pids]
+
+
+# Completions
+
+
+def view_extract_completions(view_id, prefix, tp=-1):
+    text = _views[view_id].buffer.text
+    words = []
+    seen = set()
+    for m in re.finditer(r'\w+', text):
+        word = m.group()
+        if word.startswith(prefix) and word != prefix and word not in seen \
+                and not (m.start() <= tp <= m.end()):
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def view_set_completions(view_id, req_id, completions):
+    _completions[req_id] = completions
+
+
+# Built-in text commands
+
+
+def _insert_command(view, characters=''):
+    for r in reversed(view.sel):
+        a, b = min(r[0], r[1]), max(r[0], r[1])
+        _modify(view, a, b, characters)
+    view.selection_modified = True
+
+
+def _append_command(view, characters='', force=False, scroll_to_end=False, disable_tab_translation=False):
+    size = len(view.buffer.text)
+    _modify(view, size, size, characters)
+
+
+def _select_all_command(view):
+    view.sel = [[0, len(view.buffer.text), -1]]
+    view.selection_modified = True
+
+
+def _left_delete_command(view):
+    for r in reversed(view.sel):
+        a, b = min(r[0], r[1]), max(r[0], r[1])
+        if a == b and a > 0:
+            a -= 1
+        _modify(view, a, b, '')
+    view.selection_modified = True
+
+
+builtin_text_commands.update({
+    'insert': _insert_command,
+    'append': _append_command,
+    'select_all': _select_all_command,
+    'left_delete': _left_delete_command,
+})
+
+
+UNSUPPORTED = (
+    'choose_font_dialog',
+    'folder_history',
+    'get_log_build_systems',
+    'get_log_commands',
+    'get_log_control_tree',
+    'get_log_fps',
+    'get_log_indexing',
+    'get_log_input',
+    'get_log_result_regex',
+    'html_sheet_set_contents',
+    'log_build_systems',
+    'log_commands',
+    'log_control_tree',
+    'log_fps',
+    'log_indexing',
+    'log_input',
+    'log_result_regex',
+    'notify_application_commands',
+    'open_dialog',
+    'project_history',
+    'save_dialog',
+    'select_folder_dialog',
+    'view_expand_by_class',
+    'view_export_to_html',
+    'view_find_all_results',
+    'view_find_all_results_with_text',
+    'view_find_by_class',
+    'view_fold_region',
+    'view_fold_regions',
+    'view_folded_regions',
+    'view_indented_region',
+    'view_is_folded',
+    'view_layout_to_text',
+    'view_layout_to_window',
+    'view_preserve_auto_complete_on_focus_lost',
+    'view_reset_reference_document',
+    'view_set_reference_document',
+    'view_show_popup',
+    'view_show_popup_table',
+    'view_style',
+    'view_style_for_scope',
+    'view_text_to_layout',
+    'view_transform_region_from',
+    'view_unfold_region',
+    'view_unfold_regions',
+    'view_update_popup_content',
+    'view_window_to_layout',
+    'window_bring_to_front',
+    'window_can_accept_input',
+    'window_file_history',
+    'window_focus_group',
+    'window_get_layout',
+    'window_lookup_references',
+    'window_lookup_references_in_open_files',
+    'window_lookup_symbol',
+    'window_lookup_symbol_in_open_files',
+    'window_move_sheets_to_group',
+    'window_new_html_sheet',
+    'window_num_sheets_in_group',
+    'window_promote_sheet',
+    'window_select_sheets',
+    'window_selected_sheets_in_group',
+    'window_set_layout',
+    'window_set_sheet_index',
+    'window_set_view_index',
+    'window_symbol_locations',
+    'window_system_handle',
+    'window_transient_sheet_in_group',
+    'window_transient_view_in_group',
+)
+""" The ``sublime_api`` functions used by `sublime` that aren't modelled. """
+
+
+def _unsupported(name):
+    def not_implemented(*args, **kwargs):
+        raise NotImplementedError(f'sublime_api.{name} is not available headless')
+
+    not_implemented.__name__ = name
+    return not_implemented
+
+
+for _name in UNSUPPORTED:
+    globals()[_name] = _unsupported(_name)
+del _name
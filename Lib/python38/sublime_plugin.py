@@ -1,6 +1,8 @@
 # Don't evaluate type annotations at runtime
 from __future__ import annotations
 
+import collections
+import contextlib
 import importlib
 import io
 import marshal
@@ -9,12 +11,13 @@ import sys
 import threading
 import time
 import traceback
+import types
 import zipfile
 
 import sublime
 import sublime_api
 
-from typing import Optional, TYPE_CHECKING
+from typing import Hashable, Iterable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from sublime_types import Value
@@ -137,9 +140,96 @@ text_change_listener_callbacks = {
     'on_reload_async',
 }
 text_change_listeners = {}
+buffer_mirrors = {}
 
 profile = {}
 
+# Rows built by ListInputHandlers that define list_items_key(), by handler
+# class and key
+LIST_ITEMS_CACHE_SIZE = 8
+list_items_cache = collections.OrderedDict()
+list_items_cache_lock = threading.Lock()
+
+# How long, in seconds, repeats of an exception from an event handler are
+# counted rather than printed
+EXCEPTION_REPORT_INTERVAL = 10.0
+exception_reports = {}
+exception_reports_lock = threading.Lock()
+
+
+def report_handler_exception(event_handler, e):
+    """
+    Print the traceback of an exception raised by an event handler. Repeats
+    of the same exception, from the same line, are only counted until
+    ``EXCEPTION_REPORT_INTERVAL`` has passed, after which a summary of the
+    count is printed.
+
+    :param event_handler:
+        The event handler method the exception was raised from
+
+    :param e:
+        The exception
+
+    :meta private:
+    """
+
+    tb = e.__traceback__
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    key = (event_handler.__module__, event_handler.__name__, type(e),
+           tb.tb_frame.f_code.co_filename, tb.tb_lineno)
+
+    now = time.time()
+    with exception_reports_lock:
+        report = exception_reports.get(key)
+        if report is not None and now - report[0] < EXCEPTION_REPORT_INTERVAL:
+            report[1] += 1
+            if report[1] == 1:
+                # Print the count once the window ends
+                start = report[0]
+                sublime.set_timeout_async(
+                    lambda: summarize_handler_exception(key, start),
+                    int(EXCEPTION_REPORT_INTERVAL * 1000))
+            return
+        exception_reports[key] = [now, 0]
+
+    if report is not None and report[1] > 0:
+        print_exception_summary(key, report[1])
+
+    # All this to include stack frames before the call to event_handler()
+    tb = traceback.extract_stack()[:-2]
+    tb += traceback.extract_tb(e.__traceback__)
+    out = ["Traceback (most recent call last):\n"]
+    out += traceback.format_list(tb)
+    out += traceback.format_exception_only(type(e), e)
+    print("".join(out), end="")
+
+
+def summarize_handler_exception(key, start):
+    """
+    Print how many times an exception was repeated since it was last
+    reported, see `report_handler_exception`.
+
+    :meta private:
+    """
+
+    with exception_reports_lock:
+        report = exception_reports.get(key)
+        # A newer report has already taken over and printed the count
+        if report is None or report[0] != start:
+            return
+        del exception_reports[key]
+
+    if report[1] > 0:
+        print_exception_summary(key, report[1])
+
+
+def print_exception_summary(key, count):
+    """ :meta private: """
+    module, name, exc_type, _, lineno = key
+    print(f"{exc_type.__name__} in {module}.{name} (line {lineno}) was raised "
+          f"{count} more time(s) in {EXCEPTION_REPORT_INTERVAL:g}s")
+
 
 def add_profiling(event_handler):
     """
@@ -161,19 +251,14 @@ def add_profiling(event_handler):
         try:
             return event_handler(*args)
         except (Exception) as e:
-            # All this to include stack frames before the call to
-            # event_handler() above
-            tb = traceback.extract_stack()[:-1]
-            tb += traceback.extract_tb(e.__traceback__)
-            out = ["Traceback (most recent call last):\n"]
-            out += traceback.format_list(tb)
-            out += traceback.format_exception_only(type(e), e)
-            print("".join(out), end="")
+            report_handler_exception(event_handler, e)
         finally:
             elapsed = time.time() - t0
             mod = event_handler.__module__
             p = profile.setdefault(event_handler.__name__, {})
             p.setdefault(mod, Summary()).record(elapsed)
+            if lag_monitor is not None and lag_monitor.running:
+                lag_monitor.handlers.append((t0, elapsed, event_handler.__name__, mod))
 
     # Make the method look like the original for introspection
     profiler.__doc__ = event_handler.__doc__
@@ -201,14 +286,7 @@ def trap_exceptions(event_handler):
         try:
             return event_handler(*args)
         except (Exception) as e:
-            # All this to include stack frames before the call to
-            # event_handler() above
-            tb = traceback.extract_stack()[:-1]
-            tb += traceback.extract_tb(e.__traceback__)
-            out = ["Traceback (most recent call last):\n"]
-            out += traceback.format_list(tb)
-            out += traceback.format_exception_only(type(e), e)
-            print("".join(out), end="")
+            report_handler_exception(event_handler, e)
 
     # Make the method look like the original for introspection
     exception_handler.__doc__ = event_handler.__doc__
@@ -220,6 +298,35 @@ def trap_exceptions(event_handler):
     return exception_handler
 
 
+def compact_text_changes(event_handler):
+    """
+    Decorator to pass the changes given to ``on_text_changed`` and
+    ``on_text_changed_async`` as a `sublime.TextChangeBatch`, for
+    `TextChangeListener` classes that set ``compact_changes``.
+
+    :param event_handler:
+        The event handler method - must be an unbound method
+
+    :return:
+        The decorated method
+
+    :meta private:
+    """
+
+    def compactor(self, changes):
+        if not isinstance(changes, sublime.TextChangeBatch):
+            changes = sublime.TextChangeBatch(changes)
+        return event_handler(self, changes)
+
+    # Make the method look like the original for introspection
+    compactor.__doc__ = event_handler.__doc__
+    compactor.__name__ = event_handler.__name__
+    compactor.__module__ = event_handler.__module__
+    compactor.__func__ = event_handler
+    compactor.compacts_text_changes = True
+    return compactor
+
+
 def decorate_handler(cls, method_name):
     """
     Decorates an event handler method with exception trapping, and in the case
@@ -303,9 +410,38 @@ def unload_plugin(modulename):
         del sys.modules[modulename]
 
 
+# The modification time of each plugin module's file, when it was loaded
+module_mtimes = {}
+
+
 def reload_plugin(modulename):
     print(f"reloading plugin {modulename}")
 
+    # Also reload any modules of the package that changed since they were
+    # loaded, and every module that depends on them, dependencies first
+    if modulename in sys.modules:
+        names = modules_to_reload(modulename)
+    else:
+        names = [modulename]
+
+    for name in names:
+        if name == modulename:
+            reload_plugin_module(modulename)
+            continue
+
+        print(f"reloading module {name}")
+        m = sys.modules[name]
+        is_plugin = "__plugins__" in m.__dict__ or "plugin_loaded" in m.__dict__
+        if is_plugin:
+            unload_module(m)
+        m = importlib.reload(m)
+        if is_plugin:
+            load_module(m)
+
+    record_module_mtimes(modulename.split('.')[0])
+
+
+def reload_plugin_module(modulename):
     loaded = False
     if modulename in sys.modules:
         m = sys.modules[modulename]
@@ -327,6 +463,136 @@ def reload_plugin(modulename):
     load_module(m)
 
 
+def package_modules(package):
+    """
+    :returns: The loaded modules of a package, by name.
+
+    :meta private:
+    """
+    prefix = package + '.'
+    return {
+        name: m for name, m in list(sys.modules.items())
+        if (name == package or name.startswith(prefix)) and m is not None}
+
+
+def module_mtime(m):
+    """ :meta private: """
+    fname = getattr(m, '__file__', None)
+    if not fname:
+        return None
+    try:
+        return os.stat(fname).st_mtime
+    except OSError:
+        return None
+
+
+def record_module_mtimes(package):
+    """ :meta private: """
+    for name, m in package_modules(package).items():
+        mtime = module_mtime(m)
+        if mtime is not None:
+            module_mtimes[name] = mtime
+
+
+SHARED_VALUE_TYPES = (
+    int, float, complex, str, bytes, type(None), type(Ellipsis), type(NotImplemented))
+
+
+def module_dependencies(m, candidates):
+    """
+    Find the modules in ``candidates`` that ``m`` has imported names from,
+    which would be stale if those modules were reloaded without ``m``.
+
+    Module objects themselves are ignored, since `importlib.reload` updates
+    a module in place.
+
+    :meta private:
+    """
+    deps = set()
+    for key, value in list(m.__dict__.items()):
+        if key.startswith('__') or isinstance(value, types.ModuleType):
+            continue
+
+        if isinstance(value, (type, types.FunctionType)):
+            name = value.__module__
+            if name in candidates and name != m.__name__:
+                deps.add(name)
+            continue
+
+        if isinstance(value, SHARED_VALUE_TYPES) or (isinstance(value, (tuple, frozenset)) and not value):
+            # Builtin singletons and interned values are shared by every
+            # module, so say nothing about where the name was imported from
+            continue
+
+        # Other values, imported with "from x import y". Values that know
+        # their module, like typing special forms and enum members, only
+        # count when that module is a candidate holding the same object.
+        # Otherwise the value must be held under the same name by exactly
+        # one other candidate for that to be identified as its origin.
+        module = getattr(value, '__module__', None)
+        if isinstance(module, str):
+            holders = [module] if module in candidates else []
+        else:
+            holders = list(candidates)
+        holders = [
+            name for name in holders
+            if name != m.__name__ and candidates[name].__dict__.get(key) is value]
+        if len(holders) == 1:
+            deps.add(holders[0])
+    return deps
+
+
+def modules_to_reload(modulename):
+    """
+    :returns:
+        The names of the modules to reload, in dependency order, when the
+        plugin ``modulename`` is reloaded: the modules of the same package
+        that changed on disk since they were loaded, the modules that
+        depend on those, and ``modulename`` itself.
+
+    :meta private:
+    """
+    modules = package_modules(modulename.split('.')[0])
+
+    changed = {modulename}
+    for name, m in modules.items():
+        mtime = module_mtime(m)
+        if mtime is not None and name in module_mtimes and mtime > module_mtimes[name]:
+            changed.add(name)
+
+    deps = {name: module_dependencies(m, modules) for name, m in modules.items()}
+    dependents = {name: set() for name in modules}
+    for name, names in deps.items():
+        for dep in names:
+            dependents[dep].add(name)
+
+    # Everything that directly or indirectly imports a changed module
+    stale = set()
+    todo = list(changed)
+    while todo:
+        name = todo.pop()
+        if name not in stale and name in modules:
+            stale.add(name)
+            todo.extend(dependents[name])
+
+    # Order so that each module is reloaded after the modules it depends on
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name in visited:
+            return
+        visited.add(name)
+        for dep in sorted(deps[name]):
+            if dep in stale:
+                visit(dep)
+        order.append(name)
+
+    for name in sorted(stale):
+        visit(name)
+    return order
+
+
 def load_module(m):
     module_plugins = []
     on_activated_targets = []
@@ -403,7 +669,22 @@ def load_module(m):
                         vel_on_activated_async_targets.append(t)
                     module_plugins.append(t)
 
-                if issubclass(t, TextChangeListener) and t is not TextChangeListener:
+                if (issubclass(t, TextChangeListener) and t is not TextChangeListener
+                        and t is not BufferMirror):
+                    if t.compact_changes:
+                        for name in ('on_text_changed', 'on_text_changed_async'):
+                            # The handler may be inherited from a base class
+                            # that isn't in a plugin module
+                            handler = next((c.__dict__[name] for c in t.__mro__ if name in c.__dict__), None)
+                            if handler is None:
+                                continue
+                            # Already compacted, possibly under exception trapping
+                            inner = getattr(handler, '__func__', handler)
+                            if getattr(handler, 'compacts_text_changes', False) or \
+                                    getattr(inner, 'compacts_text_changes', False):
+                                continue
+                            setattr(t, name, compact_text_changes(handler))
+
                     for name in text_change_listener_callbacks:
                         if name in dir(t):
                             decorate_handler(t, name)
@@ -656,6 +937,10 @@ def detach_view(view_id):
     if view_id in view_event_listeners:
         del view_event_listeners[view_id]
 
+    sublime._drop_view_settings_cache(view_id)
+    with sublime._view_snapshots_lock:
+        sublime._view_snapshots.pop(view_id, None)
+
     # A view has closed, which implies 'is_primary' may have changed, so see if
     # any of the ViewEventListener classes need to be created.
     # Call this in a timeout, as 'view' will still be reporting itself as a
@@ -890,6 +1175,131 @@ def get_profiling_data():
     return out
 
 
+lag_monitor = None
+
+
+class LagMonitor:
+    """
+    Measures how long callbacks wait to run on the main thread. Every
+    ``interval`` milliseconds the async thread schedules a probe with
+    ``sublime.set_timeout(..., 0)``, and the delay until it runs is kept in
+    a ring buffer of the last ``capacity`` samples.
+
+    Probes that wait at least ``spike_threshold`` seconds are kept as spikes,
+    along with the time taken by each profiled event handler that ran while
+    the probe was waiting.
+
+    :meta private:
+    """
+
+    def __init__(self, interval=250, capacity=1024, spike_threshold=0.05):
+        self.interval = interval
+        self.spike_threshold = spike_threshold
+        self.samples = collections.deque(maxlen=capacity)
+        self.spikes = collections.deque(maxlen=32)
+        # (start, elapsed, event, module) of recently run handlers, filled in
+        # by add_profiling
+        self.handlers = collections.deque(maxlen=256)
+        self.running = False
+        # Incremented by each start(), so probes from an earlier start are
+        # dropped rather than running alongside the new chain
+        self.generation = 0
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.generation += 1
+            generation = self.generation
+            sublime.set_timeout_async(lambda: self._send_probe(generation), 0)
+
+    def stop(self):
+        self.running = False
+
+    def _send_probe(self, generation):
+        if self.running and generation == self.generation:
+            sent = time.time()
+            sublime.set_timeout(lambda: self._receive_probe(sent, generation), 0)
+
+    def _receive_probe(self, sent, generation):
+        if generation != self.generation:
+            return
+
+        received = time.time()
+        lag = received - sent
+        self.samples.append(lag)
+
+        if lag >= self.spike_threshold:
+            culprits = {}
+            for start, elapsed, event, module in list(self.handlers):
+                if start + elapsed >= sent and start <= received:
+                    key = (event, module)
+                    culprits[key] = culprits.get(key, 0.0) + elapsed
+            self.spikes.append((sent, lag, sorted(
+                ((event, module, t) for (event, module), t in culprits.items()),
+                key=lambda c: -c[2])))
+
+        if self.running:
+            sublime.set_timeout_async(lambda: self._send_probe(generation), self.interval)
+
+    def percentile(self, p):
+        """ :returns: The ``p``-th percentile lag, in seconds. """
+        samples = sorted(self.samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+    def data(self):
+        """
+        :returns:
+            A ``dict`` with the sample ``count``, the ``p50``, ``p90``,
+            ``p99`` and ``max`` lag in seconds, and the ``spikes`` as
+            ``(time, lag, [(event, module, seconds), ...])``.
+        """
+        return {
+            'count': len(self.samples),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': max(self.samples, default=0.0),
+            'spikes': list(self.spikes),
+        }
+
+
+def start_lag_monitor(interval=250):
+    """
+    Start measuring the main thread's lag, see `LagMonitor`.
+
+    :meta private:
+    """
+    global lag_monitor
+    if lag_monitor is None:
+        lag_monitor = LagMonitor(interval)
+    lag_monitor.interval = interval
+    lag_monitor.start()
+
+
+def stop_lag_monitor():
+    """
+    Stop measuring the main thread's lag. The samples taken so far are kept.
+
+    :meta private:
+    """
+    if lag_monitor is not None:
+        lag_monitor.stop()
+
+
+def get_lag_data():
+    """
+    :returns: `LagMonitor.data` if the lag monitor has been started, else
+              ``None``.
+
+    :meta private:
+    """
+    if lag_monitor is None:
+        return None
+    return lag_monitor.data()
+
+
 def on_load(view_id):
     run_view_callbacks('on_load', view_id)
 
@@ -931,6 +1341,11 @@ def on_pre_save_async(view_id):
 
 
 def on_post_save(view_id):
+    # Saving a file in a package may add or change a resource
+    file_name = sublime_api.view_file_name(view_id)
+    if file_name and file_name.startswith(sublime.packages_path()):
+        sublime._invalidate_resource_cache()
+
     run_view_callbacks('on_post_save', view_id)
 
 
@@ -1057,8 +1472,10 @@ def on_query_completions(view_id, req_id, prefix, locations):
     def norm_res(res):
         if isinstance(res, tuple):
             completion_lists.append(sublime.CompletionList(res[0], flags=res[1]))
-        elif isinstance(res, list):
+        elif isinstance(res, (list, sublime.CompletionItemArray)):
             completion_lists.append(sublime.CompletionList(res))
+        elif isinstance(res, sublime.FrozenCompletionList):
+            completion_lists.append(sublime.CompletionList(res.completions_for(prefix), res.flags))
         elif isinstance(res, sublime.CompletionList):
             completion_lists.append(res)
 
@@ -1185,6 +1602,11 @@ class CommandInputHandler:
     """
     """
 
+    # State of the pending deferred preview, see preview_delay()
+    _preview_serial = 0
+    _preview_handle = None
+    _preview_result = None
+
     def name(self) -> str:
         """
         The command argument name this input handler is editing. Defaults to
@@ -1234,6 +1656,25 @@ class CommandInputHandler:
         """
         return ""
 
+    def preview_delay(self) -> float:
+        """
+        How long, in seconds, to wait after the last change before calling
+        `preview()`. Return a non-zero delay for previews that are expensive,
+        or that apply the previewed value, like a color scheme picker does.
+
+        With a delay, `preview()` is called on the main thread once the user
+        stops changing the input, and a call is skipped when a later change
+        supersedes it, or the input is confirmed or canceled. Running on the
+        main thread means a preview that applies state can't interleave with
+        `cancel()` restoring it. Sublime Text only asks for the preview when
+        the input changes, so the preview area shows the most recent finished
+        result.
+
+        Defaults to ``0``, calling `preview()` for every change and showing
+        its result immediately.
+        """
+        return 0
+
     def validate(self, text: str) -> bool:
         """
         Called whenever the user presses enter in the text entry box.
@@ -1266,7 +1707,11 @@ class CommandInputHandler:
         return self.next_input(args)
 
     def preview_(self, v):
-        ret = self.preview(v)
+        delay = self.preview_delay()
+        if delay > 0:
+            ret = self.defer_preview_(v, delay)
+        else:
+            ret = self.preview(v)
 
         if ret is None:
             return ("", 0)
@@ -1280,10 +1725,34 @@ class CommandInputHandler:
             return self.validate(v, event)
         return self.validate(v)
 
+    def defer_preview_(self, v, delay):
+        self.cancel_preview_()
+        serial = self._preview_serial
+
+        def run_preview():
+            if serial != self._preview_serial:
+                return
+            ret = self.preview(v)
+            # Discard the result if the preview itself confirmed, canceled or
+            # replaced the input
+            if serial == self._preview_serial:
+                self._preview_result = ret
+
+        self._preview_handle = sublime.set_timeout(run_preview, int(delay * 1000))
+        return self._preview_result
+
+    def cancel_preview_(self):
+        self._preview_serial += 1
+        if self._preview_handle is not None:
+            self._preview_handle.cancel()
+            self._preview_handle = None
+
     def cancel_(self):
+        self.cancel_preview_()
         self.cancel()
 
     def confirm_(self, v, event):
+        self.cancel_preview_()
         if self.want_event():
             self.confirm(v, event)
         else:
@@ -1351,18 +1820,19 @@ class ListInputHandler(CommandInputHandler):
     command to a :path:`Default.sublime-commands` file.*
     """
 
-    def list_items(self) -> list[str] | \
-            tuple[list[str], int] | \
-            list[tuple[str, Value]] | \
-            tuple[list[tuple[str, Value]], int] | \
-            list[sublime.ListInputItem] | \
-            tuple[list[sublime.ListInputItem], int]:
+    def list_items(self) -> Iterable[str] | \
+            tuple[Iterable[str], int] | \
+            Iterable[tuple[str, Value]] | \
+            tuple[Iterable[tuple[str, Value]], int] | \
+            Iterable[sublime.ListInputItem] | \
+            tuple[Iterable[sublime.ListInputItem], int]:
         """
         This method should return the items to show in the list.
 
         The returned value may be a ``list`` of item, or a 2-element ``tuple``
         containing a list of items, and an ``int`` index of the item to
-        pre-select.
+        pre-select. Instead of a list, any iterable such as a generator may
+        be returned, which is consumed once as the rows are built.
 
         The each item in the list may be one of:
 
@@ -1375,6 +1845,18 @@ class ListInputHandler(CommandInputHandler):
         """
         return []
 
+    def list_items_key(self) -> Optional[Hashable]:
+        """
+        Return a hashable key identifying the items `list_items()` would
+        return, for lists that are slow to build and rarely change. While
+        input handlers of the same class return an equal key, the rows built
+        the first time are reused and `list_items()` isn't called again.
+
+        Defaults to ``None``, meaning `list_items()` is called each time the
+        handler is shown.
+        """
+        return None
+
     def description(self, value, text: str) -> str:
         """
         The text to show in the *Command Palette* when this input handler is not
@@ -1384,40 +1866,33 @@ class ListInputHandler(CommandInputHandler):
         return text
 
     def setup_(self, args):
-        items = self.list_items()
-
-        selected_item_index = -1
-
-        if isinstance(items, tuple):
-            items, selected_item_index = items
-
-        item_tuples = []
-        for item in items:
-            if isinstance(item, str):
-                item_tuples.append((item, item))
-            elif isinstance(item, (list, tuple)):
-                item_tuples.append(item)
-            elif isinstance(item, sublime.ListInputItem):
-                details = "\x1f".join(item.details) if isinstance(item.details, (list, tuple)) else item.details
-                if item.annotation != "" or item.kind != (sublime.KIND_ID_AMBIGUOUS, "", ""):
-                    kind_letter = 0
-                    if isinstance(item.kind[1], str) and len(item.kind[1]) == 1:
-                        kind_letter = ord(item.kind[1])
-                    item_tuples.append((
-                        (
-                            item.text,
-                            details,
-                            item.annotation,
-                            (item.kind[0], kind_letter, item.kind[2])
-                        ),
-                        item.value
-                    ))
-                elif details is not None and details != "":
-                    item_tuples.append(((item.text, details, True), item.value))
-                else:
-                    item_tuples.append((item.text, item.value))
-            else:
-                raise TypeError("items must contain only str, list, tuple or sublime.ListInputItem objects")
+        key = self.list_items_key()
+        if key is not None:
+            key = (type(self), key)
+            with list_items_cache_lock:
+                cached = list_items_cache.get(key)
+                if cached is not None:
+                    list_items_cache.move_to_end(key)
+        else:
+            cached = None
+
+        if cached is not None:
+            item_tuples, selected_item_index = cached
+        else:
+            items = self.list_items()
+
+            selected_item_index = -1
+
+            if isinstance(items, tuple):
+                items, selected_item_index = items
+
+            item_tuples = list_input_rows(items)
+
+            if key is not None:
+                with list_items_cache_lock:
+                    list_items_cache[key] = (item_tuples, selected_item_index)
+                    while len(list_items_cache) > LIST_ITEMS_CACHE_SIZE:
+                        list_items_cache.popitem(last=False)
 
         props = {
             "initial_text": self.initial_text(),
@@ -1436,6 +1911,45 @@ class ListInputHandler(CommandInputHandler):
         return res
 
 
+def list_input_rows(items):
+    """
+    Convert the items returned by `ListInputHandler.list_items` to the rows
+    passed to Sublime Text.
+
+    :meta private:
+    """
+    item_tuples = []
+    append = item_tuples.append
+    ambiguous = (sublime.KIND_ID_AMBIGUOUS, "", "")
+    for item in items:
+        if isinstance(item, str):
+            append((item, item))
+        elif isinstance(item, (list, tuple)):
+            append(item)
+        elif isinstance(item, sublime.ListInputItem):
+            details = "\x1f".join(item.details) if isinstance(item.details, (list, tuple)) else item.details
+            if item.annotation != "" or item.kind != ambiguous:
+                kind_letter = 0
+                if isinstance(item.kind[1], str) and len(item.kind[1]) == 1:
+                    kind_letter = ord(item.kind[1])
+                append((
+                    (
+                        item.text,
+                        details,
+                        item.annotation,
+                        (item.kind[0], kind_letter, item.kind[2])
+                    ),
+                    item.value
+                ))
+            elif details is not None and details != "":
+                append(((item.text, details, True), item.value))
+            else:
+                append((item.text, item.value))
+        else:
+            raise TypeError("items must contain only str, list, tuple or sublime.ListInputItem objects")
+    return item_tuples
+
+
 class Command:
     """
     """
@@ -2281,6 +2795,16 @@ class TextChangeListener:
         application.
     """
 
+    compact_changes = False
+    """
+    Set to ``True`` to have ``on_text_changed`` and ``on_text_changed_async``
+    receive a `sublime.TextChangeBatch` rather than a list of
+    `sublime.TextChange`. Sublime Text delivers a list, so the batch is built
+    from it and costs extra time per event. It only pays off for listeners
+    that keep many changes around, as the batch is a handful of arrays
+    rather than three objects per change.
+    """
+
     @classmethod
     def is_applicable(cls, buffer: sublime.Buffer):
         """
@@ -2341,6 +2865,260 @@ class TextChangeListener:
         return self.__key is not None
 
 
+class BufferMirror(TextChangeListener):
+    """
+    A `TextChangeListener` that keeps a copy of the text of a `sublime.Buffer`
+    in Python, up to date by replaying each `sublime.TextChange` as it
+    arrives. Reading from the mirror doesn't call into Sublime Text, and
+    keeping it current costs work proportional to the size of each edit
+    rather than to the size of the buffer.
+
+    The text is stored as a list of chunks of roughly `CHUNK_SIZE`
+    characters. Their lengths are kept in a Fenwick tree, so finding the
+    chunk holding a point and updating the length of an edited chunk are
+    both logarithmic in the number of chunks. The tree is only rebuilt when
+    an edit splits, merges or removes chunks.
+
+    Use `BufferMirror.for_buffer` to share a single mirror per buffer.
+    Mirrors are not created automatically for every buffer, and importing
+    this class into a plugin does not register it as a listener.
+    """
+
+    CHUNK_SIZE = 4096
+
+    @classmethod
+    def for_buffer(cls, buffer: sublime.Buffer) -> BufferMirror:
+        """
+        :returns: The mirror attached to ``buffer``, attaching a new one if
+                  there isn't one yet.
+        """
+        mirror = buffer_mirrors.get(buffer.buffer_id)
+        if mirror is None or not mirror.is_attached():
+            mirror = cls()
+            mirror.attach(buffer)
+        return mirror
+
+    def __init__(self):
+        """ """
+        super().__init__()
+        self._lock = threading.Lock()
+        self._chunks: list[str] = []
+        # Fenwick tree of the chunk lengths, 1-based
+        self._tree: list[int] = [0]
+        self._size = 0
+        self._text: Optional[str] = None
+        self._change_count = 0
+
+    def __repr__(self) -> str:
+        buffer_id = self.buffer.buffer_id if self.buffer else None
+        return f'BufferMirror(buffer_id={buffer_id!r}, size={self.size()!r})'
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def attach(self, buffer: sublime.Buffer):
+        """
+        Attach the mirror to a buffer and copy its current contents.
+
+        :raises ValueError: if the mirror is already attached.
+        """
+        super().attach(buffer)
+        buffer_mirrors[buffer.buffer_id] = self
+        self.resync()
+
+    def detach(self):
+        """
+        Stop mirroring the buffer. The last known contents remain readable.
+
+        :raises ValueError: if the mirror is not attached.
+        """
+        buffer_id = self.buffer.buffer_id if self.buffer else None
+        super().detach()
+        if buffer_mirrors.get(buffer_id) is self:
+            del buffer_mirrors[buffer_id]
+
+    def resync(self):
+        """
+        Replace the mirrored text with the current contents of the buffer.
+        This is done automatically on attach, revert and reload.
+        """
+        view = self.buffer.primary_view()
+        text = view.substr(sublime.Region(0, view.size()))
+        with self._lock:
+            self._chunks = self._split(text)
+            self._build()
+            self._text = text
+            self._change_count = view.change_count()
+
+    def on_text_changed(self, changes: list[sublime.TextChange]):
+        with self._lock:
+            for change in changes:
+                self._apply(change.a.pt, change.b.pt, change.str)
+            self._text = None
+        view = self.buffer.primary_view()
+        if view:
+            self._change_count = view.change_count()
+
+    def on_revert(self):
+        self.resync()
+
+    def on_reload(self):
+        self.resync()
+
+    def change_count(self) -> int:
+        """
+        :returns: The `sublime.View.change_count` of the buffer as of the last
+                  change applied to the mirror.
+        """
+        return self._change_count
+
+    def size(self) -> int:
+        """ Same as `sublime.View.size`. """
+        return self._size
+
+    def substr(self, x: sublime.Region | sublime.Point) -> str:
+        """ Same as `sublime.View.substr`. """
+        with self._lock:
+            if self._text is not None:
+                if isinstance(x, sublime.Region):
+                    return self._text[x.begin():x.end()]
+                if x < 0 or x >= len(self._text):
+                    return "\x00"
+                return self._text[x]
+
+            if isinstance(x, sublime.Region):
+                return self._slice(x.begin(), x.end())
+            if x < 0 or x >= self.size():
+                return "\x00"
+            return self._slice(x, x + 1)
+
+    def text(self) -> str:
+        """
+        :returns: The whole mirrored text. The joined string is cached until
+                  the next change.
+        """
+        with self._lock:
+            if self._text is None:
+                self._text = ''.join(self._chunks)
+            return self._text
+
+    def snapshot(self) -> sublime.TextSnapshot:
+        """
+        :returns: A `sublime.TextSnapshot` of the mirrored text, without
+                  copying it out of Sublime Text.
+        """
+        text = self.text()
+        return sublime.TextSnapshot(text, self._change_count)
+
+    def _split(self, text: str) -> list[str]:
+        size = self.CHUNK_SIZE
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _build(self):
+        chunks = self._chunks
+        tree = [0] * (len(chunks) + 1)
+        for i, chunk in enumerate(chunks, 1):
+            tree[i] += len(chunk)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._size = sum(len(chunk) for chunk in chunks)
+
+    def _add(self, i: int, delta: int):
+        """ Add ``delta`` to the length of chunk ``i``. """
+        tree = self._tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+        self._size += delta
+
+    def _chunk_start(self, i: int) -> int:
+        tree = self._tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, pt: int) -> int:
+        """
+        :returns: The index of the first chunk ending after ``pt``, the same
+                  as ``bisect.bisect_right`` on the chunk end offsets.
+        """
+        tree = self._tree
+        i = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            k = i + step
+            if k < len(tree) and tree[k] <= pt:
+                i = k
+                pt -= tree[k]
+            step >>= 1
+        return i
+
+    def _slice(self, a: int, b: int) -> str:
+        a = max(0, a)
+        b = min(b, self.size())
+        if a >= b:
+            return ''
+
+        i = self._find(a)
+        j = self._find(b - 1)
+        chunks = self._chunks
+        if i == j:
+            start = self._chunk_start(i)
+            return chunks[i][a - start:b - start]
+
+        parts = [chunks[i][a - self._chunk_start(i):]]
+        parts.extend(chunks[i + 1:j])
+        parts.append(chunks[j][:b - self._chunk_start(j)])
+        return ''.join(parts)
+
+    def _apply(self, a: int, b: int, s: str):
+        chunks = self._chunks
+        size = self.size()
+        a = max(0, min(a, size))
+        b = max(a, min(b, size))
+
+        if not chunks:
+            self._chunks = self._split(s)
+            self._build()
+            return
+
+        # The chunks holding the first and last characters touched. An
+        # insertion at the very end goes into the last chunk.
+        i = min(self._find(a), len(chunks) - 1)
+        j = max(i, self._find(b - 1)) if b > a else i
+
+        start = self._chunk_start(i)
+        text = chunks[i][:a - start] + s + chunks[j][b - self._chunk_start(j):]
+
+        if len(text) > 2 * self.CHUNK_SIZE:
+            replacement = self._split(text)
+        elif len(text) < self.CHUNK_SIZE // 2 and j + 1 < len(chunks):
+            # Merge small chunks into the next one, so a series of deletions
+            # doesn't leave lots of tiny chunks behind
+            text += chunks[j + 1]
+            j += 1
+            replacement = [text] if len(text) <= 2 * self.CHUNK_SIZE else self._split(text)
+        elif text:
+            replacement = [text]
+        else:
+            replacement = []
+
+        if i == j and len(replacement) == 1:
+            # The common case of an edit within one chunk only changes the
+            # length of that chunk
+            self._add(i, len(text) - len(chunks[i]))
+            chunks[i] = text
+            return
+
+        chunks[i:j + 1] = replacement
+        self._build()
+
+
 class MultizipImporter(importlib.abc.MetaPathFinder):
     """ :meta private: """
 
@@ -2398,6 +3176,171 @@ class MultizipImporter(importlib.abc.MetaPathFinder):
         return None
 
 
+class ZipFilePool:
+    """
+    A bounded pool of open `zipfile.ZipFile` objects, keyed by path, so
+    reading from a .sublime-package doesn't reparse its central directory
+    each time. The least recently used handle is closed when the pool is
+    full, and handles unused for ``idle_timeout`` seconds are closed so
+    package files aren't kept locked on Windows.
+
+    Handles are checked out with :meth:`checkout`. One that is evicted,
+    discarded or cleared while checked out is only closed once every
+    thread using it has finished.
+
+    :meta private:
+    """
+
+    def __init__(self, size=16, idle_timeout=10.0):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        # zippath -> [ZipFile, last used time]
+        self.handles = collections.OrderedDict()
+        # ZipFile -> number of threads that have it checked out
+        self.users = collections.Counter()
+        # Handles removed from the pool that are still checked out
+        self.retired = set()
+        self.sweep_scheduled = False
+
+    @contextlib.contextmanager
+    def checkout(self, zippath):
+        """
+        A context manager giving an open zipfile.ZipFile() for a zip file,
+        which must not be closed by the caller or used after the block
+
+        :param zippath:
+            A unicode string of the full filesystem path to the zip file
+        """
+
+        z = self.get(zippath)
+        try:
+            yield z
+        finally:
+            self.release(z)
+
+    def get(self, zippath):
+        """
+        :param zippath:
+            A unicode string of the full filesystem path to the zip file
+
+        :return:
+            An open zipfile.ZipFile() object, which must not be closed by
+            the caller and must be handed back with :meth:`release`
+        """
+
+        with self.lock:
+            entry = self.handles.get(zippath)
+            if entry is not None:
+                self.handles.move_to_end(zippath)
+                entry[1] = time.time()
+                self.users[entry[0]] += 1
+                return entry[0]
+
+        z = zipfile.ZipFile(zippath, 'r')
+        evicted = []
+        with self.lock:
+            entry = self.handles.get(zippath)
+            if entry is not None:
+                # Another thread opened it first
+                evicted.append(z)
+                z = entry[0]
+                entry[1] = time.time()
+            else:
+                self.handles[zippath] = [z, time.time()]
+                while len(self.handles) > self.size:
+                    evicted.append(self.handles.popitem(last=False)[1][0])
+            self.users[z] += 1
+
+            closing = self._retire(evicted)
+            schedule = not self.sweep_scheduled
+            self.sweep_scheduled = True
+
+        for e in closing:
+            e.close()
+        if schedule:
+            sublime.set_timeout_async(self.sweep, int(self.idle_timeout * 1000))
+        return z
+
+    def release(self, z):
+        """
+        Hand back a handle returned by :meth:`get`, closing it if it was
+        removed from the pool while checked out
+        """
+
+        with self.lock:
+            self.users[z] -= 1
+            if self.users[z] > 0:
+                return
+            del self.users[z]
+            if z not in self.retired:
+                return
+            self.retired.discard(z)
+        z.close()
+
+    def _retire(self, handles):
+        """
+        Must be called with the lock held
+
+        :param handles:
+            A list of zipfile.ZipFile() objects removed from the pool
+
+        :return:
+            A list of the handles that nobody has checked out, which the
+            caller should close once the lock is released
+        """
+
+        closing = []
+        for z in handles:
+            if self.users[z] > 0:
+                self.retired.add(z)
+            else:
+                del self.users[z]
+                closing.append(z)
+        return closing
+
+    def sweep(self):
+        """
+        Close handles that haven't been used for ``idle_timeout`` seconds
+        """
+
+        cutoff = time.time() - self.idle_timeout
+        with self.lock:
+            idle = [path for path, (_, used) in self.handles.items() if used <= cutoff]
+            closing = self._retire([self.handles.pop(path)[0] for path in idle])
+            self.sweep_scheduled = len(self.handles) > 0
+
+        for z in closing:
+            z.close()
+        if self.sweep_scheduled:
+            sublime.set_timeout_async(self.sweep, int(self.idle_timeout * 1000))
+
+    def discard(self, zippath):
+        """
+        Close the handle for a zip file, if one is open
+        """
+
+        with self.lock:
+            entry = self.handles.pop(zippath, None)
+            closing = self._retire([entry[0]] if entry is not None else [])
+        for z in closing:
+            z.close()
+
+    def clear(self):
+        """
+        Close all handles
+        """
+
+        with self.lock:
+            closing = self._retire([z for z, _ in self.handles.values()])
+            self.handles.clear()
+        for z in closing:
+            z.close()
+
+
+zip_pool = ZipFilePool()
+
+
 class ZipResourceReader(importlib.abc.ResourceReader):
     """
     Implements the resource reader interface introduced in Python 3.7
@@ -2433,7 +3376,7 @@ class ZipResourceReader(importlib.abc.ResourceReader):
         rel_zip_path = self.loader.resources.get(self.fullname, {}).get(resource)
         if not rel_zip_path:
             raise FileNotFoundError()
-        with zipfile.ZipFile(self.loader.zippath, 'r') as z:
+        with zip_pool.checkout(self.loader.zippath) as z:
             return io.BytesIO(z.read(rel_zip_path))
 
     def resource_path(self, resource):
@@ -2746,8 +3689,11 @@ class ZipLoader(importlib.abc.InspectLoader):
         self.resources = {}
         self.refreshed = time.time()
 
+        # The zip may have changed since it was last opened
+        zip_pool.discard(self.zippath)
+
         try:
-            with zipfile.ZipFile(self.zippath, 'r') as z:
+            with zip_pool.checkout(self.zippath) as z:
                 files = [i.filename for i in z.infolist()]
 
                 for f in files:
@@ -2798,6 +3744,8 @@ sys.meta_path.insert(0, multi_importer)
 
 
 def update_compressed_packages(pkgs):
+    sublime._invalidate_resource_cache()
+    zip_pool.clear()
     multi_importer.loaders = []
     for p in pkgs:
         try:
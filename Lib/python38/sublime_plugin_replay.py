@@ -0,0 +1,276 @@
+"""
+Record the events Sublime Text dispatches to plugins, and replay them
+against the headless API to benchmark keystroke latency reproducibly.
+
+Recording wraps the `sublime_plugin` module-level entry points listed in
+`RECORDED_EVENTS`. Alongside each event it stores the edits and selection
+changes made to the view since the previous event, so the replay can
+reproduce the buffer state each handler saw::
+
+    import sublime_plugin_replay
+    recorder = sublime_plugin_replay.EventRecorder()
+    recorder.start()
+    # ... use the editor ...
+    recorder.stop()
+    recorder.save('/tmp/session.jsonl')
+
+Replaying needs `sublime_api_headless` installed and the plugins loaded::
+
+    events = sublime_plugin_replay.load_events('/tmp/session.jsonl')
+    report = sublime_plugin_replay.replay(events, repeat=5)
+    print(report.summary())
+
+:meta private:
+"""
+
+import json
+import time
+
+import sublime
+import sublime_plugin
+
+__all__ = ['RECORDED_EVENTS', 'EventRecorder', 'load_events', 'replay', 'ReplayReport']
+
+RECORDED_EVENTS = (
+    'on_modified',
+    'on_modified_async',
+    'on_selection_modified',
+    'on_selection_modified_async',
+    'on_query_completions',
+    'on_text_command',
+    'on_post_text_command',
+    'on_query_context',
+    'on_activated',
+    'on_activated_async',
+)
+""" The `sublime_plugin` entry points that are recorded. All take a view id first. """
+
+
+class EventRecorder:
+    """
+    Records calls to the `sublime_plugin` entry points in `RECORDED_EVENTS`,
+    as a list of JSON-compatible events.
+
+    Each event is a list starting with its kind:
+
+    - ``["view", view_id, text, syntax, settings]`` the first time a view
+      is seen
+    - ``["edit", view_id, a, b, text]`` for text replaced since the last
+      event, found by comparing with the previous text
+    - ``["sel", view_id, [[a, b], ...]]`` when the selection changed
+    - ``["call", t, name, args]`` for the entry point call, ``t`` being the
+      seconds since recording started
+    """
+
+    def __init__(self):
+        self.events: list[list] = []
+        self._originals = {}
+        self._texts = {}
+        self._change_counts = {}
+        self._sels = {}
+        self._t0 = 0.0
+
+    def start(self):
+        """ Start recording. """
+        if self._originals:
+            return
+
+        self._t0 = time.perf_counter()
+        for name in RECORDED_EVENTS:
+            original = getattr(sublime_plugin, name)
+            self._originals[name] = original
+            setattr(sublime_plugin, name, self._wrap(name, original))
+
+    def stop(self):
+        """ Stop recording, restoring the original entry points. """
+        for name, original in self._originals.items():
+            setattr(sublime_plugin, name, original)
+        self._originals.clear()
+
+    def save(self, path: str):
+        """ Write the events to ``path``, one JSON list per line. """
+        with open(path, 'w', encoding='utf-8') as f:
+            for event in self.events:
+                f.write(json.dumps(event))
+                f.write('\n')
+
+    def _wrap(self, name, original):
+        def recorder(view_id, *args):
+            self._record_state(view_id)
+            self.events.append(
+                ['call', time.perf_counter() - self._t0, name, [view_id, *args]])
+            return original(view_id, *args)
+
+        recorder.__name__ = name
+        recorder.__doc__ = original.__doc__
+        return recorder
+
+    def _record_state(self, view_id):
+        view = sublime.View(view_id)
+
+        # Only copy and compare the text when the buffer has been modified,
+        # so recording doesn't cost O(buffer size) per event
+        change_count = view.change_count()
+        if self._change_counts.get(view_id) != change_count:
+            self._change_counts[view_id] = change_count
+            text = view.substr(sublime.Region(0, view.size()))
+
+            previous = self._texts.get(view_id)
+            if previous is None:
+                settings = view.settings()
+                self.events.append([
+                    'view', view_id, text, settings.get('syntax') or '',
+                    {k: settings.get(k) for k in ('tab_size', 'translate_tabs_to_spaces', 'word_separators')}])
+            elif previous != text:
+                self.events.append(['edit', view_id, *_diff(previous, text)])
+            self._texts[view_id] = text
+
+        sel = [[r.a, r.b] for r in view.sel()]
+        if self._sels.get(view_id) != sel:
+            self.events.append(['sel', view_id, sel])
+            self._sels[view_id] = sel
+
+
+def _diff(old, new):
+    """
+    :returns: ``(a, b, text)`` such that replacing ``old[a:b]`` with
+              ``text`` gives ``new``.
+    """
+    n = min(len(old), len(new))
+
+    # Binary search on slice comparisons, so the strings are compared in C
+    # rather than character by character
+    lo, hi = 0, n
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    start = lo
+
+    lo, hi = 0, n - start
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    end = lo
+
+    return start, len(old) - end, new[start:len(new) - end]
+
+
+def load_events(path: str) -> list[list]:
+    """ :returns: The events saved by `EventRecorder.save`. """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayReport:
+    """
+    Timings from `replay`: the time taken by each entry point call, and by
+    each profiled plugin handler.
+    """
+
+    def __init__(self):
+        self.calls: dict[str, list[float]] = {}
+        """ Seconds taken by each call, by entry point name. """
+        self.handlers: dict[tuple[str, str], tuple[int, float, float]] = {}
+        """ ``(count, max, total)`` seconds, by ``(event, module)``. """
+
+    def record(self, name: str, elapsed: float):
+        self.calls.setdefault(name, []).append(elapsed)
+
+    def percentile(self, name: str, p: float) -> float:
+        """ :returns: The ``p``-th percentile time of the ``name`` calls. """
+        times = sorted(self.calls.get(name, ()))
+        if not times:
+            return 0.0
+        return times[min(len(times) - 1, int(p / 100 * len(times)))]
+
+    def summary(self) -> str:
+        """ :returns: A table of the timings, in milliseconds. """
+        lines = [f"{'event':<32}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}"]
+        for name, times in sorted(self.calls.items()):
+            lines.append(
+                f"{name:<32}{len(times):>8}{sum(times) / len(times) * 1000:>10.3f}"
+                f"{self.percentile(name, 50) * 1000:>10.3f}"
+                f"{self.percentile(name, 95) * 1000:>10.3f}{max(times) * 1000:>10.3f}")
+
+        if self.handlers:
+            lines.append('')
+            lines.append(f"{'handler':<56}{'count':>8}{'mean':>10}{'max':>10}")
+            for (event, module), (count, max_, total) in sorted(self.handlers.items()):
+                lines.append(
+                    f"{event + ' ' + module:<56}{count:>8}"
+                    f"{total / count * 1000:>10.3f}{max_ * 1000:>10.3f}")
+        return '\n'.join(lines)
+
+
+def replay(events: list[list], repeat=1) -> ReplayReport:
+    """
+    Replay recorded events against the loaded plugins, using the headless
+    API. Each recorded view is recreated in a new view, edits and selections
+    are applied without dispatching events, and then each call is made and
+    timed. Async timeouts queued by a call run after it, and are not timed.
+
+    :param repeat: How many times to replay the events.
+    """
+    import sublime_api_headless
+
+    report = ReplayReport()
+    before = _profile_totals()
+
+    for _ in range(repeat):
+        views = {}
+        req_ids = iter(range(1, 1 << 62))
+        window = sublime.active_window()
+
+        for event in events:
+            kind = event[0]
+            if kind == 'view':
+                _, view_id, text, syntax, settings = event
+                view = window.new_file()
+                sublime_api_headless.apply_edit(view.view_id, 0, 0, text)
+                view.settings().update({k: v for k, v in settings.items() if v is not None})
+                if syntax:
+                    view.assign_syntax(syntax)
+                views[view_id] = view.view_id
+            elif kind == 'edit':
+                _, view_id, a, b, text = event
+                sublime_api_headless.apply_edit(views[view_id], a, b, text)
+            elif kind == 'sel':
+                _, view_id, regions = event
+                sublime_api_headless.set_selection(views[view_id], regions)
+            elif kind == 'call':
+                _, _, name, args = event
+                args = [views.get(args[0], args[0]), *args[1:]]
+                if name == 'on_query_completions':
+                    # Request ids must be unique per replay
+                    args[1] = next(req_ids)
+
+                t0 = time.perf_counter()
+                getattr(sublime_plugin, name)(*args)
+                report.record(name, time.perf_counter() - t0)
+
+                sublime_api_headless.process_events()
+
+        for view_id in views.values():
+            sublime.View(view_id).close()
+        sublime_api_headless.process_events()
+
+    after = _profile_totals()
+    for key, (count, max_, total) in after.items():
+        prev_count, _, prev_total = before.get(key, (0, 0.0, 0.0))
+        if count > prev_count:
+            report.handlers[key] = (count - prev_count, max_, total - prev_total)
+    return report
+
+
+def _profile_totals():
+    totals = {}
+    for event, modules in sublime_plugin.profile.items():
+        for module, summary in modules.items():
+            totals[(event, module)] = (summary.count, summary.max, summary.sum)
+    return totals
@@ -29,6 +29,9 @@ def timing(func):
     return wrap
 
 
+STRING_OR_COMMENT = sublime.Selector("string, comment")
+
+
 def match_selector(view, pt, scope):
     # This will catch scenarios like:
     # - .foo {font-style: |}
@@ -53,6 +56,10 @@ class CSSCompletions(sublime_plugin.EventListener):
     def props(self):
         return completions.get_properties()
 
+    @cached_property
+    def property_name_completions(self):
+        return {}
+
     @cached_property
     def re_name(self):
         return re.compile(r"([a-zA-Z-]+)\s*:[^:;{}]*$")
@@ -86,6 +93,8 @@ class CSSCompletions(sublime_plugin.EventListener):
             # TODO: provide selectors, at-rules
             items = None
 
+        if isinstance(items, sublime.FrozenCompletionList):
+            return items
         if items:
             return sublime.CompletionList(items, sublime.INHIBIT_WORD_COMPLETIONS)
         return None
@@ -114,14 +123,22 @@ class CSSCompletions(sublime_plugin.EventListener):
             if not value and not term and not match_selector(view, pt, "meta.group"):
                 suffix += ";"
 
-        return (
-            sublime.CompletionItem(
-                trigger=prop,
-                completion=prop + suffix,
-                completion_format=sublime.COMPLETION_FORMAT_SNIPPET,
-                kind=KIND_CSS_PROPERTY
-            ) for prop in self.props
-        )
+        # There are only a few different suffixes, so the completions for
+        # each are built once and reused.
+        items = self.property_name_completions.get(suffix)
+        if items is None:
+            items = self.property_name_completions[suffix] = sublime.FrozenCompletionList(
+                [
+                    sublime.CompletionItem(
+                        trigger=prop,
+                        completion=prop + suffix,
+                        completion_format=sublime.COMPLETION_FORMAT_SNIPPET,
+                        kind=KIND_CSS_PROPERTY
+                    ) for prop in self.props
+                ],
+                sublime.INHIBIT_WORD_COMPLETIONS
+            )
+        return items
 
     def complete_property_value(self, view, prefix, pt):
         completions = [
@@ -168,15 +185,24 @@ class CSSCompletions(sublime_plugin.EventListener):
         func_name = ""
         nest_level = 1
         # Look for the beginning of the current function call's arguments list,
-        # while ignoring any nested function call or group.
-        for i in range(pt - 1, pt - 32 * 1024, -1):
-            ch = view.substr(i)
-            # end of nested arguments list or group before caret
-            if ch == ")" and not view.match_selector(i, "string, comment"):
-                nest_level += 1
-                continue
-            # begin of maybe nested arguments list or group before caret
-            if ch == "(" and not view.match_selector(i, "string, comment"):
+        # while ignoring any nested function call or group. The text is read
+        # in chunks, and the scopes of all brackets in a chunk in one call.
+        end = pt
+        limit = max(0, pt - 32 * 1024 + 1)
+        while end > limit and nest_level > 0:
+            begin = max(limit, end - 1024)
+            text = view.substr(sublime.Region(begin, end))
+            brackets = [
+                begin + i for i in range(len(text) - 1, -1, -1) if text[i] in "()"]
+            ignored = view.match_selector_many(brackets, STRING_OR_COMMENT)
+            for i, ignore in zip(brackets, ignored):
+                if ignore:
+                    continue
+                # end of nested arguments list or group before caret
+                if text[i - begin] == ")":
+                    nest_level += 1
+                    continue
+                # begin of maybe nested arguments list or group before caret
                 nest_level -= 1
                 # Stop, if nesting level drops below start value as this indicates the
                 # beginning of the arguments list the function name is of interest for.
@@ -184,6 +210,7 @@ class CSSCompletions(sublime_plugin.EventListener):
                     func_name = view.substr(view.expand_by_class(
                         i - 1, sublime.CLASS_WORD_START | sublime.CLASS_WORD_END))
                     break
+            end = begin
 
         if func_name == "var":
             return [
@@ -4,14 +4,8 @@ import sublime_plugin
 
 
 def advance_to_first_non_white_space_on_line(view, pt):
-    while True:
-        c = view.substr(pt)
-        if c == " " or c == "\t":
-            pt += 1
-        else:
-            break
-
-    return pt
+    rest_of_line = view.substr(sublime.Region(pt, view.line(pt).end()))
+    return pt + len(rest_of_line) - len(rest_of_line.lstrip(" \t"))
 
 
 def has_non_white_space_on_line(view, pt):
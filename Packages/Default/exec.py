@@ -376,8 +376,11 @@ class ExecCommand(sublime_plugin.WindowCommand, ProcessListener):
 
                 line_err_set = []
 
-                for line, column, text in errs:
-                    pt = view.text_point(line - 1, column - 1)
+                pts = view.text_point_many(
+                    [line - 1 for line, _, _ in errs],
+                    [column - 1 for _, column, _ in errs])
+
+                for (line, column, text), pt in zip(errs, pts):
                     if (line_err_set and
                             line == line_err_set[len(line_err_set) - 1][0]):
                         line_err_set[len(line_err_set) - 1][1] += (
@@ -1,3 +1,6 @@
+import time
+
+import sublime
 import sublime_api
 import sublime_plugin
 
@@ -33,14 +36,52 @@ def profile_text():
     return output
 
 
+def lag_text():
+    data = sublime_plugin.get_lag_data()
+    if not data or not data['count']:
+        return ""
+
+    output = "Main thread lag over the last {0} samples: p50: {1:.3f}s, p90: {2:.3f}s, p99: {3:.3f}s, max: {4:.3f}s\n".format(
+        data['count'],
+        data['p50'],
+        data['p90'],
+        data['p99'],
+        data['max']
+    )
+    for sent, lag, culprits in data['spikes']:
+        output += "\n    {0}: {1:.3f}s lag\n".format(time.strftime('%H:%M:%S', time.localtime(sent)), lag)
+        for event, module, elapsed in culprits:
+            output += "        {0} {1}: {2:.3f}s\n".format(module, event, elapsed)
+    return output
+
+
 class ProfilePluginsCommand(sublime_plugin.WindowCommand):
     def run_(self, edit_token, args):
         output = "This list shows how much time each plugin has taken to respond to each event:\n\n"
         output += profile_text()
 
+        lag = lag_text()
+        if lag:
+            output += "\n" + lag
+
         v = self.window.new_file()
         v.set_scratch(True)
         v.set_name('Plugin Event Profile')
         edit = v.begin_edit(edit_token, "")
         v.insert(edit, 0, output)
         v.end_edit(edit)
+
+
+class ToggleLagMonitorCommand(sublime_plugin.ApplicationCommand):
+    def run(self):
+        monitor = sublime_plugin.lag_monitor
+        if monitor is not None and monitor.running:
+            sublime_plugin.stop_lag_monitor()
+            sublime.status_message("Main thread lag monitor stopped")
+        else:
+            sublime_plugin.start_lag_monitor()
+            sublime.status_message("Main thread lag monitor started")
+
+    def is_checked(self):
+        monitor = sublime_plugin.lag_monitor
+        return monitor is not None and monitor.running
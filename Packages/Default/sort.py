@@ -81,13 +81,15 @@ def unique_selection(v, e):
 
 def shrink_wrap_region(view, region):
     a, b = region.begin(), region.end()
+    text = view.substr(region)
+    start = a
 
     for a in range(a, b):
-        if not view.substr(a).isspace():
+        if not text[a - start].isspace():
             break
 
     for b in range(b - 1, a, -1):
-        if not view.substr(b).isspace():
+        if not text[b - start].isspace():
             b += 1
             break
 
@@ -97,15 +99,15 @@ def shrink_wrap_region(view, region):
 def shrinkwrap_and_expand_non_empty_selections_to_entire_line(v):
     regions = []
 
-    for sel in v.sel():
-        if not sel.empty():
+    for sel in v.sel().to_list():
+        if sel.empty():
+            regions.append(sel)
+        else:
             regions.append(v.line(shrink_wrap_region(v, v.line(sel))))
-            v.sel().subtract(sel)
 
-    for r in regions:
-        v.sel().add(r)
+    v.sel().set(regions)
 
-    return [s for s in v.sel() if not s.empty()]
+    return [s for s in v.sel().to_list() if not s.empty()]
 
 
 def permute_lines(f, v, e):
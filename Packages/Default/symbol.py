@@ -79,15 +79,17 @@ def filter_current_symbol(view, point, symbol, locations):
             return False
         return path == fname
 
-    new_locations = []
-    for l in locations:
-        if match_view(l.path, view):
-            symbol_begin_pt = view.text_point(l.row - 1, l.col)
-            symbol_end_pt = symbol_begin_pt + len(symbol)
-            if point >= symbol_begin_pt and point <= symbol_end_pt:
-                continue
-        new_locations.append(l)
-    return new_locations
+    in_view = [l for l in locations if match_view(l.path, view)]
+    begin_pts = view.text_point_many(
+        [l.row - 1 for l in in_view], [l.col for l in in_view])
+
+    current = set()
+    for l, symbol_begin_pt in zip(in_view, begin_pts):
+        symbol_end_pt = symbol_begin_pt + len(symbol)
+        if point >= symbol_begin_pt and point <= symbol_end_pt:
+            current.add(id(l))
+
+    return [l for l in locations if id(l) not in current]
 
 
 def scroll_to(row, col, view):
@@ -50,10 +50,6 @@ class ColorSchemeInputHandler(sublime_plugin.ListInputHandler):
     # The color_scheme when this input handler was created
     original = None
 
-    # The last previewed color_scheme - used to debounce the search so we
-    # aren't applying a new color scheme with every keypress
-    last_previewed = None
-
     # The placeholder to show in the command palette
     placeholder_ = None
 
@@ -125,23 +121,20 @@ class ColorSchemeInputHandler(sublime_plugin.ListInputHandler):
         else:
             None
 
+    def preview_delay(self):
+        # Debounce the search so we aren't applying a new color scheme with
+        # every keypress
+        return 0.25
+
     def preview(self, name):
         if name is None:
             return
 
-        self.last_previewed = name
-
-        def update_cs():
-            # The color scheme to preview has been updated since
-            # the timeout was created
-            if name != self.last_previewed:
-                return
-            if self.prefs.get('color_scheme') == name:
-                return
-            self.prefs.set('color_scheme', name)
-            for i in self.overridden_views():
-                i['settings'].set('color_scheme', name)
-        sublime.set_timeout(update_cs, 250)
+        if self.prefs.get('color_scheme') == name:
+            return
+        self.prefs.set('color_scheme', name)
+        for i in self.overridden_views():
+            i['settings'].set('color_scheme', name)
 
         return None
 
@@ -306,10 +299,6 @@ class ThemeInputHandler(sublime_plugin.ListInputHandler):
     # The theme when this input handler was created
     original = None
 
-    # The last previewed theme - used to debounce the search so we
-    # aren't applying a new color scheme with every keypress
-    last_previewed = None
-
     # The placeholder to show in the command palette
     placeholder_ = None
 
@@ -377,21 +366,18 @@ class ThemeInputHandler(sublime_plugin.ListInputHandler):
         else:
             None
 
+    def preview_delay(self):
+        # Debounce the search so we aren't applying a new theme with every
+        # keypress
+        return 0.25
+
     def preview(self, name):
         if name is None:
             return
 
-        self.last_previewed = name
-
-        def update_theme():
-            # The color scheme to preview has been updated since
-            # the timeout was created
-            if name != self.last_previewed:
-                return
-            if self.prefs.get('theme') == name:
-                return
-            self.prefs.set('theme', name)
-        sublime.set_timeout(update_theme, 250)
+        if self.prefs.get('theme') == name:
+            return
+        self.prefs.set('theme', name)
 
         return None
 
@@ -455,11 +441,15 @@ class ResourceNameInputHandler(sublime_plugin.ListInputHandler):
         return "Name"
 
     def list_items(self):
-        items = []
-        for f in sublime.find_resources(''):
-            if f.startswith("Packages/"):
-                items.append(f[len("Packages/"):])
-        return items
+        return (
+            f[len("Packages/"):]
+            for f in sublime.find_resources('')
+            if f.startswith("Packages/")
+        )
+
+    def list_items_key(self):
+        # The resource list only changes when the resource cache is refreshed
+        return sublime.resource_cache_stats()['generation']
 
 
 class ViewResourceCommand(sublime_plugin.WindowCommand):
@@ -142,6 +142,11 @@ def get_name_for_view(view):
 
 
 def get_lines_for_view(view):
+    # Reuse the text of a mirror some other plugin keeps for this buffer,
+    # rather than copying the whole buffer out again
+    mirror = sublime_plugin.buffer_mirrors.get(view.buffer_id())
+    if mirror is not None and mirror.change_count() == view.change_count():
+        return splitlines_keep_ends(mirror.text())
     return splitlines_keep_ends(view.substr(sublime.Region(0, view.size())))
 
 
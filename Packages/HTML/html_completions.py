@@ -17,6 +17,14 @@ KIND_TAG_MARKUP = (sublime.KIND_ID_MARKUP, 't', 'Tag')
 
 ENABLE_TIMING = False
 
+# Selectors remember their score for each scope name, so repeated queries in
+# the same context don't call into Sublime Text again
+IN_TAG = sublime.Selector("meta.tag")
+IN_TAG_ATTRIBUTES = sublime.Selector(
+    "text.html meta.tag - meta.string - punctuation.definition.tag.begin")
+OUTSIDE_TAG = sublime.Selector(
+    "text.html - meta.tag, text.html punctuation.definition.tag.begin")
+
 
 boolean_attributes = {
     'async', 'autofocus', 'autoplay', 'checked', 'contenteditable', 'controls',
@@ -58,7 +66,7 @@ def get_entity_completions():
     Generate a completion list for HTML entities.
     """
 
-    return sublime.CompletionList(
+    return sublime.FrozenCompletionList(
         [
             sublime.CompletionItem(
                 trigger='#00;',
@@ -140,7 +148,7 @@ def get_tag_completions(inside_tag=True):
 
     tag_begin = '' if inside_tag else '<'
 
-    return sublime.CompletionList(
+    return sublime.FrozenCompletionList(
         [
             *(
                 sublime.CompletionItem(
@@ -416,6 +424,9 @@ class HtmlTagCompletions(sublime_plugin.EventListener):
     Provide tag completions for HTML
     """
 
+    # The sublime.Selector for the default_completions_selector setting
+    default_selector = None
+
     @cached_property
     def entity_completions(self):
         return get_entity_completions()
@@ -440,7 +451,7 @@ class HtmlTagCompletions(sublime_plugin.EventListener):
         It uses the keys of `self.tag_attributes` dictionary as it contains
         all known/supported tag names and is available/cached anyway.
         """
-        return sublime.CompletionList(
+        return sublime.FrozenCompletionList(
             [
                 sublime.CompletionItem(
                     trigger=tag,
@@ -464,10 +475,14 @@ class HtmlTagCompletions(sublime_plugin.EventListener):
         if isinstance(selector, list):
             selector = ''.join(selector)
 
-        def match_selector(selector):
-            return view.match_selector(locations[0], selector)
+        if self.default_selector is None or self.default_selector.selector != selector:
+            self.default_selector = sublime.Selector(selector)
+
+        # Match all selectors against the same scope name, so that only one
+        # scope lookup is made for the caret.
+        scope = view.scope_name(locations[0])
 
-        if not match_selector(selector):
+        if not self.default_selector.match(scope):
             return None
 
         pt = locations[0] - len(prefix) - 1
@@ -479,18 +494,18 @@ class HtmlTagCompletions(sublime_plugin.EventListener):
         if ch == '<':
             # If the caret is within tag, complete only tag names.
             # see: https://github.com/sublimehq/sublime_text/issues/3508
-            if match_selector("meta.tag"):
+            if IN_TAG.match(scope):
                 return self.tag_name_completions
             return self.tag_completions
 
         # Note: Exclude opening punctuation to enable abbreviations
         #       if the caret is located directly in front of a html tag.
-        if match_selector("text.html meta.tag - meta.string - punctuation.definition.tag.begin"):
+        if IN_TAG_ATTRIBUTES.match(scope):
             if ch in ' \f\n\t':
                 return self.attribute_completions(view, locations[0], prefix)
             return None
 
-        if match_selector("text.html - meta.tag, text.html punctuation.definition.tag.begin"):
+        if OUTSIDE_TAG.match(scope):
             # Expand tag and attribute abbreviations
             return self.expand_tag_attributes(view, locations) or self.tag_abbreviations
 
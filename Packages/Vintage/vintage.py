@@ -34,7 +34,7 @@ g_input_state = InputState()
 def update_status_line(view):
     desc = []
 
-    if view.settings().get('command_mode'):
+    if view.cached_settings().get('command_mode'):
         if g_input_state.motion_mode == MOTION_MODE_LINE:
             desc = ['VISUAL LINE MODE']
         elif view.has_non_empty_selection_region():
@@ -389,9 +389,7 @@ def transform_selection(view, f, extend = False, clip_to_line = False):
         else:
             new_sel.append(sublime.Region(new_pt))
 
-    sel.clear()
-    for r in new_sel:
-        sel.add(r)
+    sel.replace_all(new_sel)
 
 def transform_selection_regions(view, f):
     new_sel = []
@@ -402,9 +400,7 @@ def transform_selection_regions(view, f):
         if nr is not None:
             new_sel.append(nr)
 
-    sel.clear()
-    for r in new_sel:
-        sel.add(r)
+    sel.replace_all(new_sel)
 
 def expand_to_full_line(view, ignore_trailing_newline = True):
     new_sel = []